@@ -11,5 +11,11 @@ python manage.py collectstatic --noinput
 echo "Running migrations..."
 python manage.py migrate --noinput
 
+echo "Rebuilding search documents..."
+python manage.py rebuild_search_docs
+
+echo "Reconciling estate property counts..."
+python manage.py reconcile_estate_counts
+
 echo "Build complete!"
 
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('locations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='estate',
+            index=models.Index(fields=['-property_count'], name='locations_estate_count_idx'),
+        ),
+    ]
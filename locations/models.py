@@ -136,7 +136,7 @@ class Estate(models.Model):
     
     # Location metadata
     is_popular = models.BooleanField(default=False)  # Popular areas for listings
-    property_count = models.IntegerField(default=0)  # Cached count of properties
+    property_count = models.IntegerField(default=0)  # Available properties; kept by properties.estate_counts
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -148,6 +148,7 @@ class Estate(models.Model):
         indexes = [
             models.Index(fields=['sub_county', 'name']),
             models.Index(fields=['is_popular']),
+            models.Index(fields=['-property_count'], name='locations_estate_count_idx'),
         ]
     
     def __str__(self):
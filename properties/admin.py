@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils import timezone
 from .models import Property, PropertyImage, PropertyVideo, PropertyAmenity, Booking, LandlordApplication
+from .search import sync_search_docs
 
 
 @admin.register(LandlordApplication)
@@ -82,6 +83,8 @@ class PropertyAdmin(admin.ModelAdmin):
             verification_score=95,
             verified_at=timezone.now()
         )
+        # update() skips signals, so refresh the search docs explicitly
+        sync_search_docs(queryset.values_list('pk', flat=True))
         self.message_user(request, f'{updated} property/properties approved successfully.')
     approve_verification.short_description = "Approve verification for selected properties"
     
@@ -93,6 +96,8 @@ class PropertyAdmin(admin.ModelAdmin):
             verification_score=30,
             verified_at=timezone.now()
         )
+        # update() skips signals, so refresh the search docs explicitly
+        sync_search_docs(queryset.values_list('pk', flat=True))
         self.message_user(request, f'{updated} property/properties rejected.')
     reject_verification.short_description = "Reject verification for selected properties"
     
@@ -104,6 +109,8 @@ class PropertyAdmin(admin.ModelAdmin):
             verification_score=65,
             verified_at=timezone.now()
         )
+        # update() skips signals, so refresh the search docs explicitly
+        sync_search_docs(queryset.values_list('pk', flat=True))
         self.message_user(request, f'{updated} property/properties marked as partial match.')
     mark_partial_match.short_description = "Mark as partial match"
     
@@ -115,6 +122,8 @@ class PropertyAdmin(admin.ModelAdmin):
             verification_score=20,
             verified_at=timezone.now()
         )
+        # update() skips signals, so refresh the search docs explicitly
+        sync_search_docs(queryset.values_list('pk', flat=True))
         self.message_user(request, f'{updated} property/properties marked as failed.')
     mark_failed.short_description = "Mark as failed verification"
 
@@ -0,0 +1,69 @@
+"""
+Headline statistics for the custom admin dashboard
+
+One conditional-aggregate query per table (Count(..., filter=Q(...))) instead
+of a count() per number, and the whole block is cached for STATS_TIMEOUT so
+repeated page loads skip the table scans entirely.
+"""
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .models import Booking, LandlordApplication, Property
+
+STATS_CACHE_KEY = 'custom_admin:stats'
+STATS_TIMEOUT = 60
+
+
+def compute_admin_stats():
+    """Four queries, whatever the table sizes"""
+    week_ago = timezone.now() - timedelta(days=7)
+    
+    by_status = {
+        f'status_{value}': Count('id', filter=Q(verification_status=value))
+        for value, _ in Property.VERIFICATION_STATUS
+    }
+    properties = Property.objects.aggregate(
+        total_properties=Count('id'),
+        verified_properties=Count('id', filter=Q(verification_status='approved', ai_verification_result='MATCH')),
+        recent_properties=Count('id', filter=Q(created_at__gte=week_ago)),
+        avg_price=Avg('price'),
+        **by_status,
+    )
+    users = User.objects.aggregate(
+        total_users=Count('id'),
+        recent_users=Count('id', filter=Q(date_joined__gte=week_ago)),
+    )
+    bookings = Booking.objects.aggregate(
+        total_bookings=Count('id'),
+        pending_bookings=Count('id', filter=Q(status='pending')),
+        recent_bookings=Count('id', filter=Q(created_at__gte=week_ago)),
+    )
+    landlords = LandlordApplication.objects.aggregate(
+        total_landlords=Count('id', filter=Q(status='approved')),
+        pending_landlord_apps=Count('id', filter=Q(status='pending')),
+    )
+    
+    status_counts = {value: properties.pop(f'status_{value}') for value, _ in Property.VERIFICATION_STATUS}
+    return {
+        **properties,
+        'avg_price': properties['avg_price'] or 0,
+        'pending_properties': status_counts['pending'],
+        'rejected_properties': status_counts['rejected'],
+        'properties_by_status': [
+            {'verification_status': value, 'count': count}
+            for value, count in sorted(status_counts.items(), key=lambda item: -item[1])
+            if count
+        ],
+        **users,
+        **bookings,
+        **landlords,
+    }
+
+
+def admin_stats():
+    """Cached stats block; at most STATS_TIMEOUT seconds stale"""
+    return cache.get_or_set(STATS_CACHE_KEY, compute_admin_stats, STATS_TIMEOUT)
@@ -5,3 +5,5 @@ class PropertiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'properties'
 
+    def ready(self):
+        from . import signals  # noqa: F401
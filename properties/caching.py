@@ -0,0 +1,206 @@
+"""
+Versioned response caching for the listing APIs
+
+Every write that reaches the search docs (see search.sync_search_docs) bumps
+a single listings version. Cached responses, facets and map clusters embed
+that version in their keys, so a change to any Property, PropertyImage or
+PropertyAmenity invalidates them all at once while unrelated requests keep
+hitting. The version doubles as the Last-Modified time and ETag seed.
+"""
+import functools
+import hashlib
+import time
+from collections import Counter
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date, parse_http_date_safe
+
+from .filters import FILTER_PARAMS, normalized_filters
+
+VERSION_KEY = 'property_listings:version'
+LOCATIONS_VERSION_KEY = 'locations:version'
+STATS_KEYS = {'hit': 'property_listings:hits', 'miss': 'property_listings:misses'}
+STATS_FLUSH_SECONDS = 30
+RESPONSE_TIMEOUT = 600
+# Per-property versions expire once idle, so ids that are never requested
+# again do not pile up; a regenerated version only costs clients a refetch
+PROPERTY_VERSION_TIMEOUT = 7 * 24 * 3600
+# Stored in place of a version for ids known not to exist
+PROPERTY_MISSING = 0
+MISSING_TIMEOUT = 60
+
+# Everything besides the filters that changes the response body
+RESPONSE_PARAMS = FILTER_PARAMS + ['cursor', 'page_size', 'sort', 'facets', 'fields', 'format']
+
+# This process's hit/miss counts not yet added to STATS_KEYS
+_pending_stats = Counter()
+_stats_flushed_at = time.monotonic()
+
+
+def listings_version():
+    """Current listings version: milliseconds since the epoch of the last change"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns() // 1_000_000
+        # add() so concurrent first requests agree on one value
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_listings_version():
+    """Invalidate every cached listing response, facet set and cluster tile"""
+    version = time.time_ns() // 1_000_000
+    cache.set(VERSION_KEY, max(version, (cache.get(VERSION_KEY) or 0) + 1), None)
+
+
+def locations_version():
+    """Version of the County/SubCounty/Ward/Estate tables (ms timestamp of the last change)"""
+    version = cache.get(LOCATIONS_VERSION_KEY)
+    if version is None:
+        version = time.time_ns() // 1_000_000
+        cache.add(LOCATIONS_VERSION_KEY, version, None)
+        version = cache.get(LOCATIONS_VERSION_KEY, version)
+    return version
+
+
+def bump_locations_version():
+    """Invalidate everything built from the location hierarchy"""
+    version = time.time_ns() // 1_000_000
+    cache.set(LOCATIONS_VERSION_KEY, max(version, (cache.get(LOCATIONS_VERSION_KEY) or 0) + 1), None)
+
+
+def _property_version_key(property_id):
+    return f'property_detail:version:{property_id}'
+
+
+def cached_property_version(property_id):
+    """
+    The property's version if one is cached, PROPERTY_MISSING if it is known
+    not to exist, else None. Never creates a key.
+    """
+    return cache.get(_property_version_key(property_id))
+
+
+def property_version(property_id):
+    """Per-property version (ms timestamp of its last change) for detail documents"""
+    key = _property_version_key(property_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns() // 1_000_000
+        cache.add(key, version, PROPERTY_VERSION_TIMEOUT)
+        version = cache.get(key, version)
+    return version
+
+
+def bump_property_versions(property_ids):
+    """Invalidate the cached detail documents for property_ids"""
+    keys = [_property_version_key(pk) for pk in property_ids]
+    if not keys:
+        return
+    version = time.time_ns() // 1_000_000
+    current = cache.get_many(keys)
+    cache.set_many({key: max(version, current.get(key, 0) + 1) for key in keys}, PROPERTY_VERSION_TIMEOUT)
+
+
+def mark_properties_missing(property_ids):
+    """Answer detail requests for property_ids with 404 for a while, without a query"""
+    keys = [_property_version_key(pk) for pk in property_ids]
+    if keys:
+        cache.set_many(dict.fromkeys(keys, PROPERTY_MISSING), MISSING_TIMEOUT)
+
+
+def _flush_stats():
+    global _stats_flushed_at
+    pending = dict(_pending_stats)
+    _pending_stats.clear()
+    _stats_flushed_at = time.monotonic()
+    for outcome, count in pending.items():
+        key = STATS_KEYS[outcome]
+        try:
+            cache.incr(key, count)
+        except ValueError:
+            if not cache.add(key, count, None):
+                cache.incr(key, count)
+
+
+def _count(outcome):
+    """
+    Count a hit or miss in this process and fold the totals into the shared
+    cache at most every STATS_FLUSH_SECONDS: a cache write per request would
+    cost more than a hit saves on the file backend, whose incr() is not atomic.
+    """
+    _pending_stats[outcome] += 1
+    if time.monotonic() - _stats_flushed_at >= STATS_FLUSH_SECONDS:
+        _flush_stats()
+
+
+def cache_stats():
+    """Hit/miss counters for the listings response cache (approximate across processes)"""
+    _flush_stats()
+    hits = cache.get(STATS_KEYS['hit'], 0)
+    misses = cache.get(STATS_KEYS['miss'], 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / total, 4) if total else 0.0,
+        'version': listings_version(),
+    }
+
+
+def set_conditional_headers(response, etag, version):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(version // 1000)
+    # Clients may keep the body but must revalidate; revalidation is a cheap 304
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def is_not_modified(request, etag, version):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Weak comparison: compressed variants carry a W/ prefix (see compression.py)
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return etag in tags or '*' in tags
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE', ''))
+    return if_modified_since is not None and if_modified_since >= version // 1000
+
+
+def cached_listing_response(view):
+    """
+    Cache a GET listing view's 200 responses per normalized query and
+    listings version, with ETag/Last-Modified revalidation. The listing
+    payload does not depend on the user, so responses are shared.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != 'GET':
+            return view(request, *args, **kwargs)
+        
+        version = listings_version()
+        query_key = hashlib.md5(repr(normalized_filters(request.GET, RESPONSE_PARAMS)).encode()).hexdigest()
+        etag = f'"{version}-{query_key[:16]}"'
+        
+        if is_not_modified(request, etag, version):
+            _count('hit')
+            return set_conditional_headers(HttpResponseNotModified(), etag, version)
+        
+        cache_key = f'property_listings:response:{version}:{query_key}'
+        cached = cache.get(cache_key)
+        if cached is not None:
+            _count('hit')
+            response = HttpResponse(cached, content_type='application/json')
+            response['X-Cache'] = 'HIT'
+            return set_conditional_headers(response, etag, version)
+        
+        _count('miss')
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(cache_key, response.content, RESPONSE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            set_conditional_headers(response, etag, version)
+        return response
+    return wrapper
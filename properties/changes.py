@@ -0,0 +1,102 @@
+"""
+Incremental change feed for listings
+
+Every doc write appends PropertyChange rows, so consumers can poll
+/api/properties/changes/?since=<seq> and apply the upserts and deletes in
+O(changes) instead of re-pulling the whole inventory.
+
+The sequence is the autoincrement id, which is assigned at insert rather than
+at commit: on PostgreSQL a lower id can become visible after a higher one, and
+a consumer that had already moved past it would never see it. Each batch
+therefore ends before the first row younger than COMMIT_LAG, so any
+transaction that commits within that window is seen in order; a change whose
+transaction stays open longer may still be skipped.
+
+compact_changes() (the prune_property_changes command) keeps the log bounded:
+past the retention period only the newest row per property is kept, which is
+all a consumer needs to converge.
+"""
+from datetime import timedelta
+
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import PropertyChange, PropertySearchDoc
+
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 1000
+COMMIT_LAG = timedelta(seconds=5)
+
+
+def record_changes(upserted_ids=(), deleted_ids=()):
+    """Append one log row per property"""
+    entries = [PropertyChange(property_id=pk, action='upsert') for pk in upserted_ids]
+    entries += [PropertyChange(property_id=pk, action='delete') for pk in deleted_ids]
+    if entries:
+        PropertyChange.objects.bulk_create(entries)
+
+
+def parse_since(value):
+    """?since= -> non-negative int; raises ValueError if malformed"""
+    if not value:
+        return 0
+    try:
+        since = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('since must be a sequence number')
+    if since < 0:
+        raise ValueError('since must be a sequence number')
+    return since
+
+
+def changes_since(since, limit=DEFAULT_BATCH_SIZE):
+    """
+    The next batch of changes after sequence `since`, collapsed to the latest
+    action per property. Upserts carry the current listing; a property whose
+    doc has gone by the time we read it is reported as a delete.
+    """
+    from .search import search_doc_to_dict
+    
+    cutoff = timezone.now() - COMMIT_LAG
+    rows = list(
+        PropertyChange.objects.filter(id__gt=since)
+        .order_by('id')
+        .values_list('id', 'property_id', 'action', 'created_at')[:limit + 1]
+    )
+    # Stop at the first row still inside the lag: a lower id may yet commit
+    # before it, so nothing past it is safe to hand out
+    settled = next((i for i, row in enumerate(rows) if row[3] >= cutoff), len(rows))
+    has_more = settled > limit
+    rows = rows[:min(settled, limit)]
+    
+    latest = {}
+    for seq, property_id, action, _ in rows:
+        latest[property_id] = (seq, action)
+    upsert_ids = [pk for pk, (_, action) in latest.items() if action == 'upsert']
+    docs = PropertySearchDoc.objects.in_bulk(upsert_ids)
+    
+    upserts, deletes = [], []
+    for property_id, (seq, action) in sorted(latest.items(), key=lambda item: item[1][0]):
+        doc = docs.get(property_id)
+        if doc is None:
+            deletes.append({'seq': seq, 'id': property_id})
+        else:
+            upserts.append({'seq': seq, 'id': property_id, 'listing': search_doc_to_dict(doc)})
+    
+    return {
+        'since': since,
+        'next_since': rows[-1][0] if rows else since,
+        'has_more': has_more,
+        'upserts': upserts,
+        'deletes': deletes,
+    }
+
+
+def compact_changes(older_than):
+    """
+    Delete log rows created before older_than that a newer row for the same
+    property supersedes. Returns the number of rows deleted.
+    """
+    newest = PropertyChange.objects.filter(property_id=OuterRef('property_id')).order_by('-id').values('id')[:1]
+    deleted, _ = PropertyChange.objects.filter(created_at__lt=older_than).exclude(id=Subquery(newest)).delete()
+    return deleted
@@ -0,0 +1,110 @@
+"""
+Server-side map clustering
+
+Listings are bucketed into a fixed lat/lng grid whose cell size halves with
+each zoom level. A zoom level is split into square tiles of TILE_CELLS x
+TILE_CELLS cells; clusters are cached per (listings version, filters, zoom,
+tile) so panning only computes the tiles that are new to the viewport. All
+missing tiles are aggregated in a single GROUP BY query.
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count, FloatField, Max, Min
+from django.db.models.functions import Cast, Floor
+
+TILE_CELLS = 8
+MAX_ZOOM = 20
+MAX_TILES = 256
+CACHE_TIMEOUT = 300
+
+
+def tile_degrees(zoom):
+    """Width/height of one tile at zoom, in degrees"""
+    return 360.0 / (2 ** zoom)
+
+
+def tiles_for_bbox(west, south, east, north, zoom):
+    """(x, y) indices of every tile overlapping the box"""
+    size = tile_degrees(zoom)
+    x0, x1 = int((west + 180) // size), int((east + 180) // size)
+    y0, y1 = int((south + 90) // size), int((north + 90) // size)
+    if x1 < x0:
+        # Box crosses the antimeridian
+        xs = list(range(x0, int(360 // size) + 1)) + list(range(0, x1 + 1))
+    else:
+        xs = list(range(x0, x1 + 1))
+    return [(x, y) for x in xs for y in range(y0, y1 + 1)]
+
+
+def _cache_key(prefix, zoom, tile):
+    return f'property_clusters:{prefix}:{zoom}:{tile[0]}:{tile[1]}'
+
+
+def _aggregate(queryset, zoom, tiles):
+    """One grouped query over the rectangle spanning tiles, split back per tile"""
+    size = tile_degrees(zoom)
+    cell = size / TILE_CELLS
+    xs = [x for x, _ in tiles]
+    ys = [y for _, y in tiles]
+    west, east = min(xs) * size - 180, (max(xs) + 1) * size - 180
+    south, north = min(ys) * size - 90, (max(ys) + 1) * size - 90
+    
+    rows = queryset.filter(
+        latitude__gte=south, latitude__lt=north,
+        longitude__gte=west, longitude__lt=east,
+    ).annotate(
+        cell_x=Floor((Cast('longitude', FloatField()) + 180.0) / cell),
+        cell_y=Floor((Cast('latitude', FloatField()) + 90.0) / cell),
+    ).values('cell_x', 'cell_y').annotate(
+        count=Count('id'),
+        latitude=Avg('latitude'),
+        longitude=Avg('longitude'),
+        min_price=Min('price'),
+        max_price=Max('price'),
+        property_id=Min('id'),
+    ).order_by()
+    
+    wanted = set(tiles)
+    result = {tile: [] for tile in tiles}
+    for row in rows:
+        tile = (int(row['cell_x']) // TILE_CELLS, int(row['cell_y']) // TILE_CELLS)
+        if tile not in wanted:
+            continue
+        cluster = {
+            'latitude': round(float(row['latitude']), 6),
+            'longitude': round(float(row['longitude']), 6),
+            'count': row['count'],
+            'min_price': float(row['min_price']),
+            'max_price': float(row['max_price']),
+        }
+        if row['count'] == 1:
+            cluster['property_id'] = row['property_id']
+        result[tile].append(cluster)
+    return result
+
+
+def clusters_for_bbox(queryset, bbox, zoom, cache_prefix):
+    """
+    Return the clusters for every tile overlapping bbox at zoom.
+    cache_prefix must identify the filters applied to queryset.
+    Raises ValueError if the viewport spans too many tiles for the zoom.
+    """
+    if not 0 <= zoom <= MAX_ZOOM:
+        raise ValueError('zoom out of range')
+    tiles = tiles_for_bbox(*bbox, zoom)
+    if len(tiles) > MAX_TILES:
+        raise ValueError('bbox too large for zoom')
+    
+    keys = {tile: _cache_key(cache_prefix, zoom, tile) for tile in tiles}
+    cached = cache.get_many(list(keys.values()))
+    missing = [tile for tile, key in keys.items() if key not in cached]
+    
+    clusters = []
+    for tile, key in keys.items():
+        if key in cached:
+            clusters.extend(cached[key])
+    if missing:
+        computed = _aggregate(queryset, zoom, missing)
+        cache.set_many({keys[tile]: computed[tile] for tile in missing}, CACHE_TIMEOUT)
+        for tile in missing:
+            clusters.extend(computed[tile])
+    return clusters
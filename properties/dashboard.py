@@ -0,0 +1,54 @@
+"""
+Per-user summary behind the dashboard page
+
+Counters come from one conditional aggregate per table and the whole summary
+is cached per user. Signals drop the entry when the user's properties,
+bookings or wallet change, so a visit normally costs a single cache read.
+"""
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .models import Booking, Property
+
+SUMMARY_TIMEOUT = 60 * 15
+RECENT_LIMIT = 10
+
+
+def _summary_key(user_id):
+    return f'dashboard:summary:{user_id}'
+
+
+def invalidate_dashboard(user_id):
+    if user_id:
+        cache.delete(_summary_key(user_id))
+
+
+def compute_dashboard_summary(user):
+    """Five queries: aggregate + recent rows for properties and bookings, then the wallet"""
+    from wallet.models import Wallet
+    
+    properties = Property.objects.filter(owner=user)
+    summary = properties.aggregate(
+        total_properties=Count('id'),
+        verified_properties=Count('id', filter=Q(verification_status='approved', ai_verification_result='MATCH')),
+        pending_properties=Count('id', filter=Q(verification_status='pending')),
+    )
+    summary['user_properties'] = list(properties.only(
+        'id', 'name', 'price', 'property_type', 'verification_status', 'ai_verification_result', 'created_at',
+    ).order_by('-created_at')[:RECENT_LIMIT])
+    
+    bookings = Booking.objects.filter(user=user)
+    summary['total_bookings'] = bookings.count()
+    summary['user_bookings'] = list(
+        bookings.select_related('property').only(
+            'id', 'date', 'time_slot', 'status', 'created_at', 'property__name',
+        ).order_by('-created_at')[:RECENT_LIMIT]
+    )
+    
+    summary['wallet_balance'] = Wallet.objects.filter(user=user).values_list('balance', flat=True).first()
+    return summary
+
+
+def dashboard_summary(user):
+    """Cached summary for user; a booked property's rename shows up within SUMMARY_TIMEOUT"""
+    return cache.get_or_set(_summary_key(user.pk), lambda: compute_dashboard_summary(user), SUMMARY_TIMEOUT)
@@ -0,0 +1,197 @@
+"""
+Property detail documents for /api/properties/<id>/
+
+The document is built in a fixed number of queries (one joined select, three
+prefetches and two review queries) and cached per property version, which
+signals bump whenever the property, its media, amenities or reviews change.
+Ids that do not exist are remembered briefly in place of a version, so
+repeated requests for them are answered from the cache too.
+"""
+from django.core.cache import cache
+from django.db.models import Avg, Count
+
+from .caching import PROPERTY_MISSING, mark_properties_missing, property_version
+from .models import Property
+from .search import FALLBACK_IMAGE_URL
+from .thumbnails import srcset, variant_urls
+
+CACHE_TIMEOUT = 600  # Bounds staleness of the owner's trust score
+RECENT_REVIEWS = 5
+
+
+def _file_url(field):
+    try:
+        return field.url
+    except Exception:
+        return ''
+
+
+def _decimal(value):
+    return float(value) if value is not None else None
+
+
+def _location(prop):
+    estate = prop.estate
+    location = {
+        'string': prop.location_string or 'Location not specified',
+        'county': prop.county,
+        'sub_county': prop.sub_county,
+        'ward': '',
+        'estate': prop.estate_name,
+        'estate_id': None,
+        'street_address': prop.street_address,
+        'landmark': prop.landmark,
+        'latitude': _decimal(prop.latitude),
+        'longitude': _decimal(prop.longitude),
+    }
+    if estate:
+        location.update({
+            'county': estate.sub_county.county.name,
+            'sub_county': estate.sub_county.name,
+            'ward': estate.ward.name if estate.ward else '',
+            'estate': estate.name,
+            'estate_id': estate.id,
+        })
+    return location
+
+
+def _owner(prop):
+    owner = prop.owner
+    data = {
+        'id': owner.id,
+        'name': owner.get_full_name() or owner.username,
+        'trust_score': None,
+    }
+    try:
+        trust = owner.trust_score
+    except Exception:
+        # No TrustScore row yet (or the reviews app is not migrated)
+        trust = None
+    if trust is not None:
+        data['trust_score'] = {
+            'overall': trust.overall_score,
+            'average_rating': float(trust.average_rating),
+            'total_reviews': trust.total_reviews,
+            'is_verified_landlord': trust.is_verified_landlord,
+            'is_super_host': trust.is_super_host,
+        }
+    return data
+
+
+def _reviews(prop):
+    summary = {'count': 0, 'average': 0.0, 'breakdown': {}, 'recent': []}
+    try:
+        from reviews.models import Review
+    except ImportError:
+        return summary
+    reviews = Review.objects.filter(property=prop, is_approved=True)
+    stats = reviews.aggregate(
+        count=Count('id'),
+        average=Avg('rating'),
+        cleanliness=Avg('cleanliness_rating'),
+        location=Avg('location_rating'),
+        value=Avg('value_rating'),
+        communication=Avg('communication_rating'),
+    )
+    summary['count'] = stats['count']
+    summary['average'] = round(stats['average'] or 0, 2)
+    summary['breakdown'] = {
+        name: round(stats[name], 2) if stats[name] is not None else None
+        for name in ('cleanliness', 'location', 'value', 'communication')
+    }
+    if stats['count']:
+        summary['recent'] = [
+            {
+                'id': review.id,
+                'rating': review.rating,
+                'title': review.title,
+                'comment': review.comment,
+                'reviewer': review.reviewer.get_full_name() or review.reviewer.username,
+                'is_verified': review.is_verified,
+                'created_at': review.created_at.isoformat(),
+            }
+            for review in reviews.select_related('reviewer').order_by('-created_at')[:RECENT_REVIEWS]
+        ]
+    return summary
+
+
+def build_property_detail(property_id):
+    """Serialized detail document, or None if the property does not exist"""
+    prop = Property.objects.select_related(
+        'owner', 'owner__trust_score', 'cover_image',
+        'estate', 'estate__ward', 'estate__sub_county', 'estate__sub_county__county',
+    ).prefetch_related('images', 'videos', 'amenities').filter(pk=property_id).first()
+    if prop is None:
+        return None
+    
+    images = [
+        {
+            'id': image.id,
+            'url': _file_url(image.image),
+            'is_primary': image.is_primary,
+            'srcset': srcset(variant_urls(image.variants)),
+        }
+        for image in prop.images.all()
+    ]
+    cover = prop.cover_image
+    location = _location(prop)
+    return {
+        'id': prop.id,
+        'name': prop.name,
+        'description': prop.description,
+        'listing_type': prop.listing_type,
+        'type': prop.property_type,
+        'price': float(prop.price) if prop.price else 0,
+        'deposit': float(prop.deposit) if prop.deposit else 0,
+        'currency': prop.currency,
+        'nightly_rate': _decimal(prop.nightly_rate),
+        'bedrooms': prop.bedrooms or 0,
+        'bathrooms': prop.bathrooms or 0,
+        'square_meters': _decimal(prop.square_meters),
+        'square_feet': _decimal(prop.square_feet),
+        'available': prop.available,
+        'available_from': prop.available_from.isoformat() if prop.available_from else None,
+        'verified': prop.is_verified,
+        'verification_status': prop.verification_status,
+        'verification_score': prop.verification_score,
+        'rating': float(prop.rating) if prop.rating else 0.0,
+        'trustScore': prop.trust_score or 0,
+        'location': location['string'],
+        'location_detail': location,
+        'latitude': _decimal(prop.latitude),
+        'longitude': _decimal(prop.longitude),
+        'image': (_file_url(cover.image) if cover else '') or FALLBACK_IMAGE_URL,
+        'images': images,
+        'videos': [
+            {'id': video.id, 'url': _file_url(video.video), 'is_verification_video': video.is_verification_video}
+            for video in prop.videos.all()
+        ],
+        'amenities': [
+            {'type': amenity.amenity_type, 'label': amenity.get_amenity_type_display()}
+            for amenity in prop.amenities.all()
+        ],
+        'owner': _owner(prop),
+        'reviews': _reviews(prop),
+        'created_at': prop.created_at.isoformat(),
+        'updated_at': prop.updated_at.isoformat(),
+    }
+
+
+def get_property_detail(property_id):
+    """
+    Return (document, version), or (None, None) if the property does not
+    exist; the document is cached per property version.
+    """
+    version = property_version(property_id)
+    if version == PROPERTY_MISSING:
+        return None, None
+    key = f'property_detail:{property_id}:{version}'
+    document = cache.get(key)
+    if document is None:
+        document = build_property_detail(property_id)
+        if document is None:
+            # Replaces the version just created, which would otherwise linger
+            mark_properties_missing([property_id])
+            return None, None
+        cache.set(key, document, CACHE_TIMEOUT)
+    return document, version
@@ -0,0 +1,45 @@
+"""
+Estate.property_count: the number of available properties linked to each estate
+
+Signals keep it current with atomic F() updates as properties are created,
+deleted, moved between estates or listed/unlisted. Bulk writes that bypass
+signals (queryset.update(), bulk_update, raw fixture loads) can drift it;
+reconcile_estate_counts() repairs that from one grouped query.
+"""
+from django.db.models import Count, F
+
+from locations.models import Estate
+
+from .models import Property
+
+
+def counted_estate(estate_id, available):
+    """The estate a property with these values counts towards, if any"""
+    return estate_id if available and estate_id else None
+
+
+def move_estate_count(old_estate_id, new_estate_id):
+    """Shift one property's contribution from old to new estate (either may be None)"""
+    if old_estate_id == new_estate_id:
+        return
+    if old_estate_id:
+        Estate.objects.filter(pk=old_estate_id).update(property_count=F('property_count') - 1)
+    if new_estate_id:
+        Estate.objects.filter(pk=new_estate_id).update(property_count=F('property_count') + 1)
+
+
+def reconcile_estate_counts():
+    """Reset every drifted count; returns the number of estates corrected"""
+    actual = dict(
+        Property.objects.filter(available=True, estate__isnull=False)
+        .values_list('estate')
+        .annotate(total=Count('pk'))
+        .order_by()
+    )
+    drifted = []
+    for estate_id, stored in Estate.objects.values_list('id', 'property_count').iterator(chunk_size=2000):
+        total = actual.get(estate_id, 0)
+        if stored != total:
+            drifted.append(Estate(pk=estate_id, property_count=total))
+    Estate.objects.bulk_update(drifted, ['property_count'], batch_size=500)
+    return len(drifted)
@@ -0,0 +1,76 @@
+"""
+Streaming bulk export of listings as NDJSON or CSV
+
+The export walks the search doc table with queryset.iterator(chunk_size=...)
+and yields one encoded line at a time, so memory stays constant however large
+the inventory is. updated_since and the exported updated_at column use the
+doc's indexed_at, which advances whenever the doc's content changes, so
+incremental pulls also see changes made without Property.save() but not
+rebuilds that change nothing. The /api/properties/export/ view and the
+export_properties management command share iter_export().
+"""
+import csv
+import json
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .filters import filter_properties
+from .models import PropertySearchDoc
+from .search import LISTING_FIELDS, listing_columns, search_doc_to_dict
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def parse_updated_since(value):
+    """ISO datetime or date -> aware datetime; raises ValueError if malformed"""
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError('updated_since must be an ISO date or datetime')
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def export_queryset(params, fields=None):
+    """Filtered search docs in a stable order, loading only the exported columns"""
+    queryset = filter_properties(PropertySearchDoc.objects.all(), params)
+    updated_since = parse_updated_since(params.get('updated_since', ''))
+    if updated_since:
+        queryset = queryset.filter(indexed_at__gte=updated_since)
+    columns = listing_columns(fields or LISTING_FIELDS) + ['indexed_at']
+    return queryset.only(*columns).order_by('pk')
+
+
+class _Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+    def write(self, value):
+        return value
+
+
+def iter_export(queryset, fmt='ndjson', fields=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the export as encoded text lines"""
+    fields = list(fields or LISTING_FIELDS)
+    columns = fields + ['updated_at']
+    rows = queryset.iterator(chunk_size=chunk_size)
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(columns)
+        for doc in rows:
+            row = search_doc_to_dict(doc, fields)
+            yield writer.writerow([row[name] for name in fields] + [doc.indexed_at.isoformat()])
+    else:
+        for doc in rows:
+            row = search_doc_to_dict(doc, fields)
+            row['updated_at'] = doc.indexed_at.isoformat()
+            yield json.dumps(row, separators=(',', ':')) + '\n'
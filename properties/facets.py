@@ -0,0 +1,104 @@
+"""
+Facet counts for the search page filters
+
+All facets come from one GROUP BY over (property_type, listing_type, bedroom
+bucket, county, price bucket) on the filtered PropertySearchDoc queryset; the
+per-facet counts are rolled up from those groups in Python. Results are
+cached per listings version and normalized filter set.
+"""
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Value, When
+
+from .caching import listings_version
+from .filters import FILTER_PARAMS, filter_key
+from .models import Property
+
+CACHE_TIMEOUT = 300
+
+# Matches the bedrooms filter: 4 means "4 or more"
+BEDROOM_BUCKETS = [0, 1, 2, 3, 4]
+
+# Lower edges in KES; the last bucket is open-ended
+PRICE_EDGES = [0, 10000, 20000, 30000, 50000, 75000, 100000, 150000, 250000, 500000, 1000000, 5000000, 20000000]
+
+
+def _bedroom_bucket():
+    return Case(
+        *[When(bedrooms=n, then=Value(n)) for n in BEDROOM_BUCKETS[:-1]],
+        default=Value(BEDROOM_BUCKETS[-1]),
+        output_field=IntegerField(),
+    )
+
+
+def _price_bucket():
+    # Highest edge first so the first matching When wins
+    return Case(
+        *[When(price__gte=edge, then=Value(i)) for i, edge in reversed(list(enumerate(PRICE_EDGES)))],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def compute_facets(queryset):
+    """Facet counts for a filtered PropertySearchDoc queryset, in one query"""
+    groups = queryset.order_by().annotate(
+        bedroom_bucket=_bedroom_bucket(),
+        price_bucket=_price_bucket(),
+    ).values(
+        'property_type', 'listing_type', 'bedroom_bucket', 'county_name', 'price_bucket'
+    ).annotate(n=Count('pk'))
+    
+    property_types, listing_types = Counter(), Counter()
+    bedrooms, counties, prices = Counter(), Counter(), Counter()
+    total = 0
+    for group in groups:
+        n = group['n']
+        total += n
+        property_types[group['property_type']] += n
+        listing_types[group['listing_type']] += n
+        bedrooms[group['bedroom_bucket']] += n
+        prices[group['price_bucket']] += n
+        if group['county_name']:
+            counties[group['county_name']] += n
+    
+    property_type_labels = dict(Property.PROPERTY_TYPES)
+    listing_type_labels = dict(Property.LISTING_TYPES)
+    return {
+        'total': total,
+        'property_type': [
+            {'value': value, 'label': property_type_labels.get(value, value), 'count': count}
+            for value, count in property_types.most_common()
+        ],
+        'listing_type': [
+            {'value': value, 'label': listing_type_labels.get(value, value), 'count': count}
+            for value, count in listing_types.most_common()
+        ],
+        'bedrooms': [
+            {'value': n, 'label': f'{n}+' if n == BEDROOM_BUCKETS[-1] else str(n), 'count': bedrooms[n]}
+            for n in BEDROOM_BUCKETS
+        ],
+        'county': [
+            {'value': name, 'count': count}
+            for name, count in sorted(counties.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        'price': [
+            {
+                'min': edge,
+                'max': PRICE_EDGES[i + 1] if i + 1 < len(PRICE_EDGES) else None,
+                'count': prices[i],
+            }
+            for i, edge in enumerate(PRICE_EDGES)
+        ],
+    }
+
+
+def facet_counts(queryset, params):
+    """compute_facets(), cached by listings version and the normalized filters in params"""
+    key = f'property_facets:{listings_version()}:{filter_key(params, FILTER_PARAMS)}'
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(queryset)
+        cache.set(key, facets, CACHE_TIMEOUT)
+    return facets
@@ -0,0 +1,130 @@
+"""
+Shared query-string filters for the property listing APIs
+
+api_properties, the map cluster endpoint and anything else that lists
+properties parse the same parameters through filter_properties(), so a given
+query string always selects the same rows.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Q
+
+from .models import PropertySearchDoc
+from .search import search_properties
+from .geo import MAX_RADIUS_KM, bbox_q, filter_near, parse_bbox, parse_point
+
+# Parameters that change which rows are selected (not paging or presentation)
+ATTRIBUTE_FILTER_PARAMS = ['county', 'estate', 'minPrice', 'maxPrice', 'bedrooms', 'propertyType', 'verified']
+TEXT_FILTER_PARAMS = ['q']
+GEO_FILTER_PARAMS = ['bbox', 'near', 'radius_km']
+FILTER_PARAMS = ATTRIBUTE_FILTER_PARAMS + TEXT_FILTER_PARAMS + GEO_FILTER_PARAMS
+
+DEFAULT_RADIUS_KM = 10
+
+
+def filter_properties(queryset, params, geo=True):
+    """
+    Apply the listing filters in params (a QueryDict) to a Property or
+    PropertySearchDoc queryset.
+    Malformed attribute filters are ignored as before; malformed location
+    filters raise ValueError so callers can answer 400 instead of silently
+    returning the whole inventory.
+    """
+    county = params.get('county', '')
+    estate = params.get('estate', '')
+    min_price = params.get('minPrice', '')
+    max_price = params.get('maxPrice', '')
+    bedrooms = params.get('bedrooms', '')
+    property_type = params.getlist('propertyType')
+    verified = params.get('verified', '')
+    
+    # Search docs carry precomputed tokens for both location systems
+    is_doc = queryset.model is PropertySearchDoc
+    
+    if county:
+        if is_doc:
+            queryset = queryset.filter(county_tokens__contains=county.strip().lower())
+        else:
+            # Filter by county - check both new location system and legacy field
+            queryset = queryset.filter(
+                Q(estate__sub_county__county__name__icontains=county) |
+                Q(county__icontains=county)
+            )
+    if estate:
+        if is_doc:
+            queryset = queryset.filter(estate_tokens__contains=estate.strip().lower())
+        else:
+            # Filter by estate - check both new location system and legacy field
+            queryset = queryset.filter(
+                Q(estate__name__icontains=estate) |
+                Q(estate_name__icontains=estate)
+            )
+    if min_price:
+        try:
+            queryset = queryset.filter(price__gte=Decimal(min_price))
+        except (ValueError, InvalidOperation):
+            pass
+    if max_price:
+        try:
+            queryset = queryset.filter(price__lte=Decimal(max_price))
+        except (ValueError, InvalidOperation):
+            pass
+    if bedrooms:
+        try:
+            bed_filter = int(bedrooms)
+            if bed_filter == 4:
+                queryset = queryset.filter(bedrooms__gte=4)
+            else:
+                queryset = queryset.filter(bedrooms=bed_filter)
+        except ValueError:
+            pass
+    if property_type:
+        queryset = queryset.filter(property_type__in=property_type)
+    if verified == 'true':
+        if is_doc:
+            queryset = queryset.filter(is_verified=True)
+        else:
+            queryset = queryset.filter(verification_status='approved', ai_verification_result='MATCH')
+    
+    # Full-text search (q=) needs the search doc index
+    q = params.get('q', '')
+    if q and is_doc:
+        queryset = search_properties(queryset, q)
+    
+    if not geo:
+        return queryset
+    
+    # Map viewport and radius search (bbox=west,south,east,north / near=lat,lng&radius_km=)
+    bbox = params.get('bbox', '')
+    near = params.get('near', '')
+    if bbox:
+        queryset = queryset.filter(bbox_q(*parse_bbox(bbox)))
+    if near:
+        radius_km = float(params.get('radius_km') or DEFAULT_RADIUS_KM)
+        if not 0 < radius_km <= MAX_RADIUS_KM:
+            raise ValueError('radius_km out of range')
+        queryset = filter_near(queryset, *parse_point(near), radius_km)
+    return queryset
+
+
+# Matched case-insensitively, so their case does not change the result
+CASE_INSENSITIVE_PARAMS = {'county', 'estate', 'q'}
+
+
+def normalized_filters(params, names=FILTER_PARAMS):
+    """Canonical, order-independent form of the parameters present in params"""
+    items = []
+    for name in names:
+        values = [v.strip() for v in params.getlist(name) if v.strip()]
+        if name in CASE_INSENSITIVE_PARAMS:
+            values = [v.lower() for v in values]
+        values = sorted(values)
+        if values:
+            items.append((name, tuple(values)))
+    return tuple(items)
+
+
+def filter_key(params, names=FILTER_PARAMS):
+    """Short stable digest of the normalized filters, for cache keys"""
+    return hashlib.md5(repr(normalized_filters(params, names)).encode()).hexdigest()
@@ -0,0 +1,89 @@
+"""
+Geospatial helpers for Property search without PostGIS
+
+Searches run in two steps: a coarse latitude/longitude range filter that can
+use Index(fields=['latitude', 'longitude']), then an exact haversine distance
+evaluated only on the rows that survive it. The haversine expression is built
+from Django's portable math functions, so it runs on SQLite and PostgreSQL.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+MAX_RADIUS_KM = 500
+
+
+def parse_bbox(value):
+    """
+    Parse 'west,south,east,north' (the Leaflet/GeoJSON order) into floats.
+    Raises ValueError for malformed or out-of-range boxes.
+    """
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be west,south,east,north')
+    west, south, east, north = parts
+    if not (-90 <= south <= north <= 90) or not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError('bbox out of range')
+    return west, south, east, north
+
+
+def parse_point(value):
+    """Parse 'lat,lng' into floats"""
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 2:
+        raise ValueError('point must be lat,lng')
+    lat, lng = parts
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('point out of range')
+    return lat, lng
+
+
+def bbox_around(lat, lng, radius_km):
+    """Smallest (west, south, east, north) box containing the circle"""
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    dlng = min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180)
+    return lng - dlng, max(lat - dlat, -90), lng + dlng, min(lat + dlat, 90)
+
+
+def bbox_q(west, south, east, north, lat_field='latitude', lng_field='longitude'):
+    """Index-friendly range filter; handles boxes that cross the antimeridian"""
+    q = Q(**{f'{lat_field}__gte': south, f'{lat_field}__lte': north})
+    if west <= east:
+        return q & Q(**{f'{lng_field}__gte': west, f'{lng_field}__lte': east})
+    return q & (Q(**{f'{lng_field}__gte': west}) | Q(**{f'{lng_field}__lte': east}))
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def distance_expression(lat, lng, lat_field='latitude', lng_field='longitude'):
+    """ORM expression for the haversine distance (km) from (lat, lng)"""
+    phi = Value(math.radians(lat), output_field=FloatField())
+    lmb = Value(math.radians(lng), output_field=FloatField())
+    cos_phi = Value(math.cos(math.radians(lat)), output_field=FloatField())
+    row_phi = Radians(F(lat_field), output_field=FloatField())
+    row_lmb = Radians(F(lng_field), output_field=FloatField())
+    a = (
+        Power(Sin((row_phi - phi) / 2), 2)
+        + cos_phi * Cos(row_phi) * Power(Sin((row_lmb - lmb) / 2), 2)
+    )
+    return Value(2 * EARTH_RADIUS_KM, output_field=FloatField()) * ASin(Sqrt(a), output_field=FloatField())
+
+
+def filter_near(queryset, lat, lng, radius_km):
+    """
+    Restrict queryset to rows within radius_km of (lat, lng) and annotate
+    distance_km. The bbox prefilter narrows rows before haversine is computed.
+    """
+    queryset = queryset.filter(bbox_q(*bbox_around(lat, lng, radius_km)))
+    return queryset.annotate(distance_km=distance_expression(lat, lng)).filter(distance_km__lte=radius_km)
@@ -0,0 +1,106 @@
+"""
+In-process reverse geocoder: GPS point -> nearest Estate
+
+Estate centres and estate-linked LocationPins are bucketed into a grid of
+GRID_DEGREES cells held in memory. A lookup scans rings of cells outward from
+the point's cell and stops once no unvisited cell can hold anything closer,
+so it touches a handful of points instead of the whole table. The grid is
+rebuilt lazily when caching.locations_version() moves.
+"""
+import math
+import threading
+
+from locations.models import Estate, LocationPin
+
+from .geo import KM_PER_DEGREE_LAT, haversine_km
+
+GRID_DEGREES = 0.05  # ~5.5 km cells around the equator
+MAX_MATCH_KM = 5.0  # Further than this from any estate is not a match
+
+
+def _cell(lat, lng):
+    return math.floor(lat / GRID_DEGREES), math.floor(lng / GRID_DEGREES)
+
+
+class ReverseGeocoder:
+    def __init__(self, points):
+        # points: (latitude, longitude, estate_id)
+        self.cells = {}
+        for lat, lng, estate_id in points:
+            self.cells.setdefault(_cell(lat, lng), []).append((lat, lng, estate_id))
+
+    def _ring(self, center, radius):
+        ci, cj = center
+        if radius == 0:
+            yield center
+            return
+        for dj in range(-radius, radius + 1):
+            yield ci - radius, cj + dj
+            yield ci + radius, cj + dj
+        for di in range(-radius + 1, radius):
+            yield ci + di, cj - radius
+            yield ci + di, cj + radius
+
+    def nearest(self, lat, lng, max_km=MAX_MATCH_KM):
+        """(estate_id, distance_km) of the closest point within max_km, else None"""
+        if not self.cells:
+            return None
+        # Narrowest cell width in km at this latitude bounds how far ring r is
+        cell_km = GRID_DEGREES * KM_PER_DEGREE_LAT * max(math.cos(math.radians(abs(lat) + GRID_DEGREES)), 0.01)
+        max_rings = math.ceil(max_km / cell_km) + 1
+        center = _cell(lat, lng)
+        best = None
+        for radius in range(max_rings + 1):
+            # Everything in ring `radius` and beyond is at least (radius - 1) cells away
+            if best and best[1] <= (radius - 1) * cell_km:
+                break
+            for cell in self._ring(center, radius):
+                for point_lat, point_lng, estate_id in self.cells.get(cell, ()):
+                    distance = haversine_km(lat, lng, point_lat, point_lng)
+                    if distance <= max_km and (best is None or distance < best[1]):
+                        best = (estate_id, distance)
+        return best
+
+
+def load_points():
+    """Estate centres plus pins tied to an estate; two queries"""
+    points = [
+        (float(lat), float(lng), estate_id)
+        for estate_id, lat, lng in Estate.objects.filter(
+            center_latitude__isnull=False, center_longitude__isnull=False
+        ).values_list('id', 'center_latitude', 'center_longitude')
+    ]
+    points += [
+        (float(lat), float(lng), estate_id)
+        for estate_id, lat, lng in LocationPin.objects.filter(
+            estate__isnull=False
+        ).values_list('estate_id', 'latitude', 'longitude')
+    ]
+    return points
+
+
+_geocoder = None
+_geocoder_version = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder():
+    """The process-wide grid, rebuilt when estates or pins have changed"""
+    global _geocoder, _geocoder_version
+    from .caching import locations_version
+    
+    version = locations_version()
+    if _geocoder is None or _geocoder_version != version:
+        with _geocoder_lock:
+            if _geocoder is None or _geocoder_version != version:
+                _geocoder = ReverseGeocoder(load_points())
+                _geocoder_version = version
+    return _geocoder
+
+
+def reverse_geocode(latitude, longitude, max_km=MAX_MATCH_KM):
+    """Estate id nearest to the point, or None when nothing is within max_km"""
+    if latitude is None or longitude is None:
+        return None
+    match = get_geocoder().nearest(float(latitude), float(longitude), max_km)
+    return match[0] if match else None
@@ -0,0 +1,58 @@
+"""
+Match free-text county / sub-county / estate strings to the locations hierarchy
+
+Used by the link_property_locations backfill. All estates are loaded once into
+dicts keyed by normalized name, so matching a row is a couple of dict lookups;
+only names with no exact hit fall back to difflib, and results are memoized
+per distinct string triple since legacy rows repeat the same few values.
+"""
+import difflib
+
+from locations.models import Estate
+
+from .suggest import normalize
+
+# Words that decorate a name without identifying it ("Kilimani Estate", "Nairobi County")
+NOISE_WORDS = {'county', 'sub', 'subcounty', 'estate', 'ward', 'area', 'the'}
+FUZZY_CUTOFF = 0.85
+
+
+def location_key(text):
+    return ' '.join(word for word in normalize(text).split() if word not in NOISE_WORDS)
+
+
+class LocationMatcher:
+    def __init__(self):
+        # estate key -> [(estate_id, sub_county key, county key)]
+        self.estates = {}
+        rows = Estate.objects.values_list('id', 'name', 'sub_county__name', 'sub_county__county__name')
+        for estate_id, name, sub_county, county in rows:
+            self.estates.setdefault(location_key(name), []).append(
+                (estate_id, location_key(sub_county), location_key(county))
+            )
+        self.names = list(self.estates)
+        self._memo = {}
+
+    def _candidates(self, estate_key):
+        if estate_key in self.estates:
+            return self.estates[estate_key]
+        close = difflib.get_close_matches(estate_key, self.names, n=3, cutoff=FUZZY_CUTOFF)
+        return [candidate for name in close for candidate in self.estates[name]]
+
+    def match(self, county, sub_county, estate_name):
+        """Estate id for the strings, or None when missing or ambiguous"""
+        key = (location_key(county), location_key(sub_county), location_key(estate_name))
+        if key not in self._memo:
+            self._memo[key] = self._match(*key)
+        return self._memo[key]
+
+    def _match(self, county, sub_county, estate_name):
+        if not estate_name:
+            return None
+        candidates = self._candidates(estate_name)
+        # Narrow by whichever parent names the row gives; ignore ones that rule everything out
+        for index, value in ((2, county), (1, sub_county)):
+            if value and len(candidates) > 1:
+                narrowed = [c for c in candidates if c[index] == value]
+                candidates = narrowed or candidates
+        return candidates[0][0] if len(candidates) == 1 else None
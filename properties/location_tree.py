@@ -0,0 +1,90 @@
+"""
+The full County -> SubCounty -> Ward -> Estate tree served by /api/locations/
+
+The tree is built with one query per level and cached per
+caching.locations_version(), already serialized and compressed, so a request
+costs a cache read. Each encoding gets its own strong ETag.
+"""
+import json
+
+from django.core.cache import cache
+from django.utils.text import compress_string
+
+from locations.models import County, SubCounty, Ward, Estate
+
+from .compression import BROTLI_AVAILABLE, BROTLI_QUALITY
+
+if BROTLI_AVAILABLE:
+    import brotli
+
+TREE_TIMEOUT = 60 * 60 * 24
+# Browsers reuse the tree this long before revalidating with the ETag
+TREE_MAX_AGE = 60 * 60
+
+
+def _coordinates(row):
+    lat, lng = row['center_latitude'], row['center_longitude']
+    return {
+        'latitude': float(lat) if lat is not None else None,
+        'longitude': float(lng) if lng is not None else None,
+    }
+
+
+def build_location_tree():
+    """Nested list of counties; four queries regardless of size"""
+    counties = [
+        dict(id=row['id'], name=row['name'], code=row['code'], region=row['region'],
+             **_coordinates(row), sub_counties=[])
+        for row in County.objects.values(
+            'id', 'name', 'code', 'region', 'center_latitude', 'center_longitude'
+        ).order_by('name')
+    ]
+    by_county = {county['id']: county for county in counties}
+    
+    sub_counties = {}
+    for row in SubCounty.objects.values(
+        'id', 'county_id', 'name', 'center_latitude', 'center_longitude'
+    ).order_by('name'):
+        node = dict(id=row['id'], name=row['name'], **_coordinates(row), wards=[], estates=[])
+        sub_counties[row['id']] = node
+        by_county[row['county_id']]['sub_counties'].append(node)
+    
+    wards = {}
+    for row in Ward.objects.values(
+        'id', 'sub_county_id', 'name', 'center_latitude', 'center_longitude'
+    ).order_by('name'):
+        node = dict(id=row['id'], name=row['name'], **_coordinates(row), estates=[])
+        wards[row['id']] = node
+        sub_counties[row['sub_county_id']]['wards'].append(node)
+    
+    # Estates without a ward hang directly off their sub-county
+    for row in Estate.objects.values(
+        'id', 'ward_id', 'sub_county_id', 'name', 'is_popular',
+        'center_latitude', 'center_longitude',
+    ).order_by('name'):
+        node = dict(id=row['id'], name=row['name'], is_popular=row['is_popular'], **_coordinates(row))
+        parent = wards.get(row['ward_id']) or sub_counties[row['sub_county_id']]
+        parent['estates'].append(node)
+    
+    return counties
+
+
+def tree_etag(version, encoding=None):
+    suffix = f'-{encoding}' if encoding else ''
+    return f'"locations-{version}{suffix}"'
+
+
+def get_location_tree(version):
+    """{encoding or None: body bytes} for the tree at this locations version"""
+    key = f'locations:tree:{version}'
+    bodies = cache.get(key)
+    if bodies is None:
+        body = json.dumps(
+            {'version': version, 'counties': build_location_tree()},
+            separators=(',', ':'),
+        ).encode()
+        bodies = {None: body, 'gzip': compress_string(body)}
+        if BROTLI_AVAILABLE:
+            bodies['br'] = brotli.compress(body, quality=BROTLI_QUALITY)
+        cache.set(key, bodies, TREE_TIMEOUT)
+    return bodies
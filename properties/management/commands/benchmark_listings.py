@@ -0,0 +1,77 @@
+"""
+Management command to benchmark listing API payload size and serialization time
+Compares the full, sparse (fields=) and columnar (format=columns) encodings,
+raw and compressed. Uses in-memory search docs, so it needs no data or writes.
+"""
+import json
+import time
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from properties.compression import BROTLI_AVAILABLE, compress_body
+from properties.models import PropertySearchDoc
+from properties.search import LISTING_FIELDS, search_doc_to_dict, search_doc_to_row
+
+MAP_PIN_FIELDS = ['id', 'price', 'latitude', 'longitude']
+
+
+def sample_docs(count):
+    created = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+    return [
+        PropertySearchDoc(
+            property_id=i,
+            name=f'Modern {i % 4 + 1}BR Apartment',
+            location='Kilimani, Dagoretti North, Nairobi',
+            short_description='Spacious apartment with modern amenities, parking, backup water, '
+                              'fibre internet and 24/7 security, a short walk from Yaya Centre and '
+                              'the Ngong Road matatu stage. Ideal for young families and professionals...',
+            image_url=f'/media/properties/images/{i:08d}.jpg',
+            property_type='apartment',
+            listing_type='rental',
+            price=Decimal(20000 + (i * 731) % 180000),
+            bedrooms=i % 5,
+            bathrooms=1 + i % 3,
+            is_verified=i % 3 == 0,
+            latitude=Decimal('-1.290000') + Decimal(i % 1000) / 10000,
+            longitude=Decimal('36.780000') + Decimal(i % 997) / 10000,
+            verification_status='approved',
+            verification_score=95,
+            rating=Decimal('4.50'),
+            review_count=i % 40,
+            trust_score=80,
+            created_at=created,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark listing API encodings (payload size and serialization time)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=50, help='Timing iterations')
+
+    def handle(self, *args, **options):
+        docs = sample_docs(options['rows'])
+        repeat = options['repeat']
+        all_fields = list(LISTING_FIELDS)
+        
+        encoders = [
+            ('full', lambda: {'properties': [search_doc_to_dict(d) for d in docs]}),
+            ('fields=map pins', lambda: {'properties': [search_doc_to_dict(d, MAP_PIN_FIELDS) for d in docs]}),
+            ('format=columns', lambda: {'fields': all_fields, 'rows': [search_doc_to_row(d, all_fields) for d in docs]}),
+            ('columns + map pins', lambda: {'fields': MAP_PIN_FIELDS, 'rows': [search_doc_to_row(d, MAP_PIN_FIELDS) for d in docs]}),
+        ]
+        
+        self.stdout.write(f"{options['rows']} rows, {repeat} iterations, brotli {'on' if BROTLI_AVAILABLE else 'not installed'}")
+        self.stdout.write(f"{'encoding':<20}{'bytes':>10}{'gzip':>10}{'br':>10}{'ms/page':>10}")
+        for label, encode in encoders:
+            start = time.perf_counter()
+            for _ in range(repeat):
+                body = json.dumps(encode()).encode()
+            elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+            gzip_size = len(compress_body(body, {'gzip'})[1])
+            br_size = len(compress_body(body, {'br'})[1]) if BROTLI_AVAILABLE else '-'
+            self.stdout.write(f'{label:<20}{len(body):>10}{gzip_size:>10}{br_size:>10}{elapsed_ms:>10.2f}')
@@ -0,0 +1,55 @@
+"""
+Management command to export listings to a file as NDJSON or CSV
+Streams through the same code path as /api/properties/export/
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.http import QueryDict
+from properties.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, export_queryset, iter_export
+from properties.search import parse_listing_fields
+
+
+class Command(BaseCommand):
+    help = 'Export listings to a file as NDJSON or CSV (constant memory)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='File to write, or - for stdout')
+        parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--fields', default='', help='Comma-separated listing fields (default: all)')
+        parser.add_argument('--updated-since', default='', help='Only listings changed at or after this ISO date/datetime')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='NAME=VALUE',
+            help='Listing API filter, e.g. --filter county=Nairobi (repeatable)',
+        )
+
+    def handle(self, *args, **options):
+        params = QueryDict(mutable=True)
+        for item in options['filter']:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Filters must look like NAME=VALUE, got {item!r}')
+            params.appendlist(name, value)
+        if options['updated_since']:
+            params['updated_since'] = options['updated_since']
+        
+        try:
+            fields = parse_listing_fields(options['fields'])
+            queryset = export_queryset(params, fields)
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        lines = iter_export(queryset, options['format'], fields, options['chunk_size'])
+        if options['output'] == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        
+        count = -1 if options['format'] == 'csv' else 0  # CSV header is not a row
+        with open(options['output'], 'w', newline='', encoding='utf-8') as handle:
+            for line in lines:
+                handle.write(line)
+                count += 1
+        self.stdout.write(self.style.SUCCESS(f"Exported {max(count, 0)} listings to {options['output']}"))
@@ -0,0 +1,61 @@
+"""
+Management command to garbage-collect unreferenced media blobs
+Recounts references from the file fields first, so drift from bulk updates
+cannot cause a referenced blob to be deleted, and recounts each candidate
+again under a row lock just before deleting it. Run periodically (e.g. daily).
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from properties.media import delete_blob, reference_counts
+from properties.models import MediaBlob
+
+
+class Command(BaseCommand):
+    help = 'Reconcile MediaBlob.ref_count and delete blobs no file field points at'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=int,
+            default=24,
+            help='Keep unreferenced blobs uploaded this recently (not yet attached to a record)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report without deleting')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        counts = reference_counts()
+        
+        drifted = []
+        for blob in MediaBlob.objects.only('sha256', 'file', 'ref_count').iterator(chunk_size=2000):
+            total = counts.get(blob.file, 0)
+            if blob.ref_count != total:
+                if not dry_run:
+                    # Compare-and-set, so an acquire or release that landed after
+                    # the row was read is not overwritten; the next run fixes it
+                    MediaBlob.objects.filter(pk=blob.pk, ref_count=blob.ref_count).update(ref_count=total)
+                blob.ref_count = total
+                drifted.append(blob)
+        
+        cutoff = timezone.now() - timedelta(hours=options['grace_hours'])
+        garbage = MediaBlob.objects.filter(ref_count__lte=0, last_uploaded_at__lt=cutoff)
+        if dry_run:
+            # Drifted counts were not saved; apply them to the candidate list instead
+            fixed = {blob.sha256: blob.ref_count for blob in drifted}
+            garbage = [
+                blob for blob in MediaBlob.objects.filter(last_uploaded_at__lt=cutoff)
+                if fixed.get(blob.sha256, blob.ref_count) <= 0
+            ]
+        
+        removed = freed = 0
+        for blob in list(garbage):
+            if dry_run or delete_blob(blob, uploaded_before=cutoff):
+                removed += 1
+                freed += blob.size
+        
+        verb = 'Would remove' if dry_run else 'Removed'
+        self.stdout.write(self.style.SUCCESS(
+            f'Corrected {len(drifted)} reference counts; {verb} {removed} blobs ({freed / 1024 / 1024:.1f} MB)'
+        ))
@@ -0,0 +1,65 @@
+"""
+Management command to backfill responsive image variants
+Renders PropertyImage thumbnails across all cores; safe to rerun, since
+images whose variants match their current file are skipped.
+"""
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand, CommandError
+from properties.models import PropertyImage
+from properties.search import sync_search_docs
+from properties.thumbnails import PIL_AVAILABLE, needs_variants, read_original, render_variants, store_variants
+
+
+class Command(BaseCommand):
+    help = 'Generate 200/400/800px WebP and JPEG variants for property images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Rendering processes')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Images per search doc refresh')
+
+    def handle(self, *args, **options):
+        if not PIL_AVAILABLE:
+            raise CommandError('Pillow is required to render thumbnails')
+        workers = max(1, options['workers'])
+        chunk_size = options['chunk_size']
+        
+        images = PropertyImage.objects.exclude(image='').only('id', 'property_id', 'image', 'variants').order_by('pk')
+        rendered = skipped = 0
+        property_ids = set()
+        pending = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for image in images.iterator(chunk_size=chunk_size):
+                if not needs_variants(image):
+                    continue
+                # Bound the originals held in memory to a couple per worker
+                while len(pending) >= workers * 2:
+                    rendered += self._collect(pending, property_ids)
+                try:
+                    data = read_original(image.image.name)
+                except OSError:
+                    skipped += 1
+                    continue
+                pending[executor.submit(render_variants, data)] = image
+                if len(property_ids) >= chunk_size:
+                    sync_search_docs(property_ids)
+                    property_ids = set()
+                    self.stdout.write(f'  {rendered} images rendered')
+            while pending:
+                rendered += self._collect(pending, property_ids)
+        sync_search_docs(property_ids)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered variants for {rendered} images; {skipped} originals missing'
+        ))
+
+    def _collect(self, pending, property_ids):
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        stored = 0
+        for future in done:
+            image = pending.pop(future)
+            if store_variants(image.pk, image.image.name, future.result()):
+                property_ids.add(image.property_id)
+                stored += 1
+        return stored
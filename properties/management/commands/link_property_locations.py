@@ -0,0 +1,70 @@
+"""
+Management command to link legacy Property location strings to Estate rows
+Matches county / sub_county / estate_name in bulk and sets Property.estate
+"""
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from properties.estate_counts import reconcile_estate_counts
+from properties.location_matching import LocationMatcher
+from properties.models import Property
+from properties.search import sync_search_docs
+
+
+class Command(BaseCommand):
+    help = 'Backfill Property.estate from the legacy county/sub_county/estate_name strings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Properties updated per batch')
+        parser.add_argument(
+            '--after-id',
+            type=int,
+            default=0,
+            help='Resume from the property after this id (printed after every batch)',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Report matches without saving')
+        parser.add_argument('--show-unmatched', type=int, default=20, help='Unmatched rows to list')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        dry_run = options['dry_run']
+        matcher = LocationMatcher()
+        
+        # Only unlinked rows, so a rerun after an interruption skips finished work
+        rows = Property.objects.filter(
+            estate__isnull=True, pk__gt=options['after_id']
+        ).order_by('pk').values_list('pk', 'county', 'sub_county', 'estate_name')
+        
+        linked = 0
+        unmatched = []
+        batch = []
+        last_id = options['after_id']
+        for pk, county, sub_county, estate_name in rows.iterator(chunk_size=chunk_size):
+            last_id = pk
+            estate_id = matcher.match(county, sub_county, estate_name)
+            if estate_id is None:
+                unmatched.append((pk, county, sub_county, estate_name))
+                continue
+            batch.append(Property(pk=pk, estate_id=estate_id, updated_at=timezone.now()))
+            if len(batch) >= chunk_size:
+                linked += self._save(batch, dry_run)
+                batch = []
+                self.stdout.write(f'  {linked} linked, resume with --after-id {last_id}')
+        linked += self._save(batch, dry_run)
+        if linked and not dry_run:
+            # bulk_update bypassed the signals that maintain the counts
+            reconcile_estate_counts()
+        
+        for pk, county, sub_county, estate_name in unmatched[:options['show_unmatched']]:
+            self.stdout.write(f'  unmatched #{pk}: {estate_name!r}, {sub_county!r}, {county!r}')
+        verb = 'Would link' if dry_run else 'Linked'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {linked} properties; {len(unmatched)} unmatched (last id {last_id})'
+        ))
+
+    def _save(self, batch, dry_run):
+        if not batch or dry_run:
+            return len(batch)
+        # bulk_update skips signals, so refresh the affected search docs directly
+        Property.objects.bulk_update(batch, ['estate', 'updated_at'])
+        sync_search_docs([prop.pk for prop in batch])
+        return len(batch)
@@ -0,0 +1,207 @@
+"""
+Management command to bulk-load the County -> SubCounty -> Ward -> Estate gazetteer
+
+Reads a CSV (one row per place: county, sub_county, ward, estate, latitude,
+longitude, plus optional county_code, region, postal_code, area_type) or a
+GeoJSON FeatureCollection with the same keys in each feature's properties.
+Each row defines its deepest named level; coordinates and extra columns
+apply to that level. Parents named along the way are created if missing.
+
+Rows are upserted in batches with bulk_create(update_conflicts=True); parent
+ids come from in-memory dicts preloaded once, never per-row lookups.
+"""
+import csv
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from locations.models import County, SubCounty, Ward, Estate
+from properties.caching import bump_locations_version
+
+LEVELS = ['county', 'sub_county', 'ward', 'estate']
+COORDINATE_FIELDS = ['center_latitude', 'center_longitude']
+
+
+def _key(name):
+    return ' '.join(name.split()).lower()
+
+
+def _centroid(geometry):
+    """(lat, lng) of a Point, or the vertex average of a (Multi)Polygon's outer ring"""
+    if not geometry:
+        return None, None
+    coords = geometry.get('coordinates')
+    kind = geometry.get('type')
+    if kind == 'Point':
+        return coords[1], coords[0]
+    if kind == 'Polygon':
+        ring = coords[0]
+    elif kind == 'MultiPolygon':
+        ring = coords[0][0]
+    else:
+        return None, None
+    return sum(p[1] for p in ring) / len(ring), sum(p[0] for p in ring) / len(ring)
+
+
+def read_rows(path, fmt):
+    if fmt == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as handle:
+            for row in csv.DictReader(handle):
+                yield {(k or '').strip().lower(): (v or '').strip() for k, v in row.items()}
+    else:
+        # GeoJSON has no line structure to stream; a national file is a few MB
+        with open(path, encoding='utf-8') as handle:
+            collection = json.load(handle)
+        for feature in collection.get('features', []):
+            row = {k.lower(): str(v).strip() for k, v in (feature.get('properties') or {}).items() if v is not None}
+            if not row.get('latitude'):
+                lat, lng = _centroid(feature.get('geometry'))
+                if lat is not None:
+                    row['latitude'], row['longitude'] = str(lat), str(lng)
+            yield row
+
+
+class Command(BaseCommand):
+    help = 'Bulk upsert the location hierarchy from a gazetteer CSV or GeoJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Gazetteer .csv or .geojson/.json file')
+        parser.add_argument('--format', choices=['csv', 'geojson'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows upserted per batch')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+        fmt = options['format'] or ('csv' if path.lower().endswith('.csv') else 'geojson')
+        
+        started = time.monotonic()
+        self._preload()
+        processed = 0
+        batch = []
+        for row in read_rows(path, fmt):
+            batch.append(row)
+            if len(batch) >= options['batch_size']:
+                processed += self._load_batch(batch)
+                batch = []
+                self._progress(processed, started)
+        processed += self._load_batch(batch)
+        
+        # bulk_create skips the signals that invalidate the location caches
+        bump_locations_version()
+        self._progress(processed, started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Loaded {processed} rows: {len(self.county_ids)} counties, {len(self.sub_county_ids)} sub-counties, '
+            f'{len(self.ward_ids)} wards, {len(self.estate_ids)} estates'
+        ))
+
+    def _preload(self):
+        """Existing ids (and stored spellings) keyed by lowercased name within parent"""
+        self.county_ids, self.names = {}, {}
+        for pk, name in County.objects.values_list('id', 'name'):
+            self.county_ids[_key(name)] = pk
+            self.names[('county', _key(name))] = name
+        self.sub_county_ids = {}
+        for pk, county_id, name in SubCounty.objects.values_list('id', 'county_id', 'name'):
+            self.sub_county_ids[(county_id, _key(name))] = pk
+            self.names[('sub_county', county_id, _key(name))] = name
+        self.ward_ids = {}
+        for pk, sub_county_id, name in Ward.objects.values_list('id', 'sub_county_id', 'name'):
+            self.ward_ids[(sub_county_id, _key(name))] = pk
+            self.names[('ward', sub_county_id, _key(name))] = name
+        self.estate_ids = {}
+        for pk, sub_county_id, name in Estate.objects.values_list('id', 'sub_county_id', 'name'):
+            self.estate_ids[(sub_county_id, _key(name))] = pk
+            self.names[('estate', sub_county_id, _key(name))] = name
+
+    def _progress(self, processed, started):
+        self.stdout.write(f'  {processed} rows in {time.monotonic() - started:.1f}s')
+
+    @staticmethod
+    def _extra(row, level):
+        """Fields a row sets on `level`: coordinates only on its deepest level"""
+        fields = {}
+        deepest = not any(row.get(child) for child in LEVELS[LEVELS.index(level) + 1:])
+        if deepest:
+            try:
+                fields['center_latitude'] = round(float(row['latitude']), 6)
+                fields['center_longitude'] = round(float(row['longitude']), 6)
+            except (KeyError, TypeError, ValueError):
+                pass
+        # County columns can ride along on any row
+        if level == 'county':
+            fields.update({k: row[src] for k, src in (('code', 'county_code'), ('region', 'region')) if row.get(src)})
+        if level == 'estate':
+            fields.update({k: row[k] for k in ('postal_code', 'area_type') if row.get(k)})
+        return fields
+
+    @transaction.atomic
+    def _load_batch(self, rows):
+        rows = [row for row in rows if row.get('county')]
+        if not rows:
+            return 0
+        
+        # Counties; without a code column the name stands in (County.code is unique)
+        updates, values = {}, {}
+        for row in rows:
+            key = _key(row['county'])
+            name = self.names.setdefault(('county', key), ' '.join(row['county'].split()))
+            values[key] = {'name': name, 'code': name.upper()[:10]}
+            updates.setdefault(key, {}).update(self._extra(row, 'county'))
+        self._upsert(County, values, updates, self.county_ids, ['name'])
+        for pk, name in County.objects.filter(name__in=[v['name'] for v in values.values()]).values_list('id', 'name'):
+            self.county_ids[_key(name)] = pk
+        
+        # Sub-counties, wards and estates share one shape: unique (parent, name)
+        sub_county_parent = lambda row: self.county_ids[_key(row['county'])]
+        self._load_level(rows, 'sub_county', SubCounty, 'county', sub_county_parent)
+        in_sub_county = lambda row: self.sub_county_ids[(sub_county_parent(row), _key(row['sub_county']))]
+        self._load_level(rows, 'ward', Ward, 'sub_county', in_sub_county)
+        self._load_level(rows, 'estate', Estate, 'sub_county', in_sub_county)
+        return len(rows)
+
+    def _upsert(self, model, values, updates, ids, unique_fields):
+        """
+        values: key -> identifying fields; updates: key -> fields the rows set.
+        Nodes only named as parents are inserted if missing and left alone otherwise.
+        """
+        missing = [model(**values[key]) for key in values if not updates.get(key) and key not in ids]
+        if missing:
+            model.objects.bulk_create(missing, ignore_conflicts=True)
+        # One statement per distinct set of updated columns
+        groups = {}
+        for key, fields in updates.items():
+            if fields:
+                groups.setdefault(tuple(sorted(fields)), []).append(model(**{**values[key], **fields}))
+        for fields, objs in groups.items():
+            model.objects.bulk_create(
+                objs,
+                update_conflicts=True,
+                unique_fields=unique_fields,
+                update_fields=[field.removesuffix('_id') for field in fields],
+            )
+
+    def _load_level(self, rows, level, model, parent_field, parent_id_for):
+        ids = getattr(self, f'{level}_ids')
+        updates, values = {}, {}
+        for row in rows:
+            if not row.get(level) or not row.get('sub_county'):
+                continue
+            parent_id = parent_id_for(row)
+            key = (parent_id, _key(row[level]))
+            name = self.names.setdefault((level,) + key, ' '.join(row[level].split()))
+            values[key] = {f'{parent_field}_id': parent_id, 'name': name}
+            fields = updates.setdefault(key, {})
+            fields.update(self._extra(row, level))
+            if level == 'estate' and row.get('ward'):
+                fields['ward_id'] = self.ward_ids[(parent_id, _key(row['ward']))]
+        self._upsert(model, values, updates, ids, [parent_field, 'name'])
+        
+        parents = {parent_id for parent_id, _ in values}
+        existing = model.objects.filter(**{f'{parent_field}_id__in': parents}).values_list(
+            'id', f'{parent_field}_id', 'name'
+        )
+        for pk, parent_id, name in existing:
+            ids[(parent_id, _key(name))] = pk
@@ -0,0 +1,25 @@
+"""
+Management command to compact the listing change feed
+Run periodically (e.g. daily cron) so the PropertyChange log stays bounded
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from properties.changes import compact_changes
+
+
+class Command(BaseCommand):
+    help = 'Drop change feed rows older than --days that a newer row for the same property supersedes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=30,
+            help='Rows this recent are all kept, so consumers polling within it see every change',
+        )
+
+    def handle(self, *args, **options):
+        removed = compact_changes(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} superseded change feed rows'))
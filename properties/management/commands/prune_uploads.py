@@ -0,0 +1,26 @@
+"""
+Management command to delete abandoned chunked uploads and their partial files
+Run periodically (e.g. daily cron) so stalled uploads do not fill the disk
+"""
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from properties.models import ChunkedUpload
+from properties.uploads import discard_upload
+
+
+class Command(BaseCommand):
+    help = 'Delete chunked uploads that have not progressed within --hours'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=48, help='Idle time before an upload is abandoned')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = ChunkedUpload.objects.filter(status='uploading', updated_at__lt=cutoff)
+        removed = 0
+        for upload in stale.iterator():
+            discard_upload(upload)
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} abandoned uploads'))
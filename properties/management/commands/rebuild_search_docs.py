@@ -0,0 +1,51 @@
+"""
+Management command to rebuild the PropertySearchDoc table in bulk
+Run after deploying the search doc migration, or to repair drift
+"""
+from django.core.management.base import BaseCommand
+from properties.models import Property, PropertySearchDoc
+from properties.changes import record_changes
+from properties.search import prune_full_text_index, sync_search_docs
+
+
+class Command(BaseCommand):
+    help = 'Rebuild denormalized property search documents in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of properties to rebuild per batch',
+        )
+        parser.add_argument(
+            '--log-changes',
+            action='store_true',
+            help='Also append every rebuilt property to the change feed (forces consumers to re-pull)',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        log_changes = options['log_changes']
+        
+        # Drop docs for properties that are no longer listed
+        stale = PropertySearchDoc.objects.filter(property__available=False)
+        stale_ids = list(stale.values_list('property_id', flat=True))
+        removed, _ = stale.delete()
+        record_changes(deleted_ids=stale_ids)
+        
+        written = 0
+        chunk = []
+        ids = Property.objects.filter(available=True).order_by('pk').values_list('pk', flat=True)
+        for pk in ids.iterator(chunk_size=chunk_size):
+            chunk.append(pk)
+            if len(chunk) >= chunk_size:
+                written += sync_search_docs(chunk, log_changes=log_changes)
+                chunk = []
+                self.stdout.write(f'  {written} documents written...')
+        written += sync_search_docs(chunk, log_changes=log_changes)
+        prune_full_text_index()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {written} search documents, removed {removed} stale documents'
+        ))
@@ -0,0 +1,19 @@
+"""
+Management command to repair drift in Estate.property_count
+Signals keep the counts current; run this periodically (e.g. nightly cron)
+to fix rows changed by bulk updates that skip signals.
+"""
+from django.core.management.base import BaseCommand
+from properties.caching import bump_locations_version
+from properties.estate_counts import reconcile_estate_counts
+
+
+class Command(BaseCommand):
+    help = 'Recount available properties per estate and fix drifted Estate.property_count values'
+
+    def handle(self, *args, **options):
+        fixed = reconcile_estate_counts()
+        if fixed:
+            # Autocomplete ranks by property_count
+            bump_locations_version()
+        self.stdout.write(self.style.SUCCESS(f'Corrected property_count on {fixed} estates'))
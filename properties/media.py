@@ -0,0 +1,164 @@
+"""
+Content-addressed, deduplicated media storage
+
+Uploads are hashed with SHA-256 in one streaming pass over their chunks and
+stored once under uploads/<first two hex digits>/<sha256><ext>; uploading the
+same bytes again returns the existing blob. Model file fields listed in
+BLOB_REFERENCES point at a blob simply by holding its path, and signals keep
+MediaBlob.ref_count in step as those rows are saved and deleted.
+"""
+import hashlib
+from urllib.parse import urlparse
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import MediaBlob
+from .thumbnails import THUMBNAIL_FORMATS, THUMBNAIL_WIDTHS, variant_name
+
+BLOB_PREFIX = 'uploads/'
+
+# File fields that may hold a blob path, by model label
+BLOB_REFERENCES = {
+    'properties.PropertyImage': ['image'],
+    'properties.PropertyVideo': ['video'],
+    'leases.DocumentVault': ['document_file'],
+    'kyc.KYCVerification': [
+        'id_document_front', 'id_document_back', 'kra_pin_document', 'title_deed_document', 'face_photo',
+    ],
+}
+
+
+def blob_path(digest, ext):
+    return f'{BLOB_PREFIX}{digest[:2]}/{digest}{ext.lower()}'
+
+
+def is_blob_path(name):
+    return bool(name) and name.startswith(BLOB_PREFIX) and name.count('/') == 2
+
+
+def file_digest(content):
+    """SHA-256 hex digest and size of a django File, read chunk by chunk"""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in content.chunks():
+        digest.update(chunk)
+        size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def store_blob(content, ext):
+    """
+    Store a django File as a blob, or find the identical one already stored.
+    Returns (blob, created).
+    """
+    digest, size = file_digest(content)
+    existing = MediaBlob.objects.filter(sha256=digest)
+    if existing.update(last_uploaded_at=timezone.now()):
+        return existing.get(), False
+    
+    content.seek(0)
+    name = default_storage.save(blob_path(digest, ext), content)
+    try:
+        with transaction.atomic():
+            return MediaBlob.objects.create(sha256=digest, file=name, size=size), True
+    except IntegrityError:
+        # The same bytes were stored concurrently; keep theirs
+        default_storage.delete(name)
+        return MediaBlob.objects.get(sha256=digest), False
+
+
+def blob_names(urls):
+    """
+    Storage paths of the stored blobs among urls (as returned by api_upload),
+    in order; anything that is not a blob this site stored is dropped.
+    """
+    names = []
+    for url in urls:
+        path = urlparse(url).path if isinstance(url, str) else ''
+        if path.startswith(settings.MEDIA_URL):
+            name = path[len(settings.MEDIA_URL):]
+            if is_blob_path(name) and name not in names:
+                names.append(name)
+    stored = set(MediaBlob.objects.filter(file__in=names).values_list('file', flat=True))
+    return [name for name in names if name in stored]
+
+
+def _adjust(names, delta):
+    names = [name for name in names if is_blob_path(name)]
+    if names:
+        MediaBlob.objects.filter(file__in=names).update(ref_count=F('ref_count') + delta)
+
+
+def acquire_blobs(names):
+    _adjust(names, 1)
+
+
+def release_blobs(names):
+    _adjust(names, -1)
+
+
+def field_names(instance, fields):
+    """
+    Stored paths of the instance's file fields, read from __dict__ so neither
+    storage nor deferred columns are touched; None marks a deferred field.
+    """
+    values = []
+    for field in fields:
+        if field not in instance.__dict__:
+            values.append(None)
+            continue
+        value = instance.__dict__[field]
+        values.append(getattr(value, 'name', value) or '')
+    return values
+
+
+def reference_counts():
+    """{blob path: number of file fields holding it}, one grouped query per field"""
+    counts = {}
+    for label, fields in BLOB_REFERENCES.items():
+        model = apps.get_model(label)
+        for field in fields:
+            rows = model.objects.filter(**{f'{field}__startswith': BLOB_PREFIX}).values_list(field).annotate(
+                total=Count('pk')
+            ).order_by()
+            for name, total in rows:
+                counts[name] = counts.get(name, 0) + total
+    return counts
+
+
+def live_references(name):
+    """Number of file fields holding name right now, counted from the rows themselves"""
+    total = 0
+    for label, fields in BLOB_REFERENCES.items():
+        model = apps.get_model(label)
+        for field in fields:
+            total += model.objects.filter(**{field: name}).count()
+    return total
+
+
+def delete_blob(blob, uploaded_before=None):
+    """
+    Delete an unreferenced blob and its variants. The row is locked and its
+    references recounted first, so a blob attached while the collector ran
+    survives; returns False in that case.
+    """
+    with transaction.atomic():
+        locked = MediaBlob.objects.select_for_update().filter(pk=blob.pk, ref_count__lte=0)
+        if uploaded_before is not None:
+            locked = locked.filter(last_uploaded_at__lt=uploaded_before)
+        if not locked.exists() or live_references(blob.file):
+            return False
+        locked.delete()
+    
+    names = [blob.file] + [
+        variant_name(blob.file, width, fmt) for width in THUMBNAIL_WIDTHS for fmt in THUMBNAIL_FORMATS
+    ]
+    for name in names:
+        if default_storage.exists(name):
+            default_storage.delete(name)
+    return True
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-17 09:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0004_alter_property_options_property_assigned_agent_and_more'),
+    ]
+
+    def backfill_cover_images(apps, schema_editor):
+        """Point each property at its primary image, else its oldest upload"""
+        Property = apps.get_model('properties', 'Property')
+        PropertyImage = apps.get_model('properties', 'PropertyImage')
+        covers = {}
+        for image_id, property_id in PropertyImage.objects.order_by(
+            'property_id', '-is_primary', 'uploaded_at', 'id'
+        ).values_list('id', 'property_id'):
+            covers.setdefault(property_id, image_id)
+        for property_id, image_id in covers.items():
+            Property.objects.filter(pk=property_id).update(cover_image_id=image_id)
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='cover_image',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='properties.propertyimage'),
+        ),
+        migrations.RunPython(backfill_cover_images, migrations.RunPython.noop),
+    ]
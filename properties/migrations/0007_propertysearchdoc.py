@@ -0,0 +1,45 @@
+# Generated by Django 4.2.10 on 2026-10-17 11:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0006_property_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertySearchDoc',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_doc', serialize=False, to='properties.property')),
+                ('name', models.CharField(max_length=200)),
+                ('location', models.CharField(max_length=400)),
+                ('short_description', models.CharField(max_length=210)),
+                ('image_url', models.CharField(blank=True, max_length=500)),
+                ('county_tokens', models.CharField(blank=True, max_length=300)),
+                ('estate_tokens', models.CharField(blank=True, max_length=300)),
+                ('amenity_tokens', models.CharField(blank=True, max_length=500)),
+                ('listing_type', models.CharField(max_length=20)),
+                ('property_type', models.CharField(max_length=30)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('bedrooms', models.IntegerField(default=0)),
+                ('bathrooms', models.IntegerField(default=0)),
+                ('is_verified', models.BooleanField(default=False)),
+                ('latitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('longitude', models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True)),
+                ('verification_status', models.CharField(max_length=20)),
+                ('verification_score', models.IntegerField(default=0)),
+                ('rating', models.DecimalField(decimal_places=2, default=0.0, max_digits=3)),
+                ('review_count', models.IntegerField(default=0)),
+                ('trust_score', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['created_at', 'property'], name='properties__created_076fbe_idx'), models.Index(fields=['latitude', 'longitude'], name='properties__latitud_c95c9f_idx'), models.Index(fields=['price'], name='properties__price_a79b0d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.10 on 2026-10-17 12:30
+
+from django.db import migrations, models
+from django.db.utils import OperationalError
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0007_propertysearchdoc'),
+    ]
+
+    def create_full_text_index(apps, schema_editor):
+        """SQLite: standalone FTS5 table. PostgreSQL: generated tsvector column + GIN index."""
+        vendor = schema_editor.connection.vendor
+        if vendor == 'sqlite':
+            try:
+                schema_editor.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS properties_search_fts USING fts5("
+                    "name, location, search_text, "
+                    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+                )
+            except OperationalError:
+                # SQLite built without FTS5 - search falls back to LIKE matching
+                pass
+        elif vendor == 'postgresql':
+            schema_editor.execute(
+                "ALTER TABLE properties_propertysearchdoc ADD COLUMN search_vector tsvector "
+                "GENERATED ALWAYS AS ("
+                "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(location, '')), 'B') || "
+                "setweight(to_tsvector('simple', coalesce(search_text, '')), 'C')"
+                ") STORED"
+            )
+            schema_editor.execute(
+                "CREATE INDEX properties_searchdoc_vector_idx "
+                "ON properties_propertysearchdoc USING GIN (search_vector)"
+            )
+
+    def drop_full_text_index(apps, schema_editor):
+        vendor = schema_editor.connection.vendor
+        if vendor == 'sqlite':
+            schema_editor.execute("DROP TABLE IF EXISTS properties_search_fts")
+        elif vendor == 'postgresql':
+            schema_editor.execute("DROP INDEX IF EXISTS properties_searchdoc_vector_idx")
+            schema_editor.execute("ALTER TABLE properties_propertysearchdoc DROP COLUMN IF EXISTS search_vector")
+
+    operations = [
+        migrations.AddField(
+            model_name='propertysearchdoc',
+            name='search_text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(create_full_text_index, drop_full_text_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.10 on 2026-10-17 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0008_propertysearchdoc_full_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertysearchdoc',
+            name='county_name',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
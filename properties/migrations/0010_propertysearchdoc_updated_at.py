@@ -0,0 +1,24 @@
+# Generated by Django 4.2.10 on 2026-10-17 15:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0009_propertysearchdoc_county_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertysearchdoc',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='propertysearchdoc',
+            index=models.Index(fields=['updated_at'], name='properties__updated_07ed27_idx'),
+        ),
+    ]
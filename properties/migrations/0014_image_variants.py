@@ -0,0 +1,23 @@
+# Generated by Django 4.2.10 on 2026-10-17 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0013_mediablob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='propertysearchdoc',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.10 on 2026-10-17 16:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0014_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='propertyimage',
+            name='exif_checked',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='gps_latitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='gps_longitude',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=9, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='location_score',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='propertyimage',
+            name='taken_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0015_image_exif'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='propertysearchdoc',
+            name='properties__updated_07ed27_idx',
+        ),
+        migrations.RemoveField(
+            model_name='propertysearchdoc',
+            name='updated_at',
+        ),
+        migrations.AddField(
+            model_name='propertysearchdoc',
+            name='indexed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='propertysearchdoc',
+            index=models.Index(fields=['indexed_at'], name='properties__indexed_d70080_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.10 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0016_propertysearchdoc_indexed_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='propertychange',
+            index=models.Index(fields=['property_id', 'id'], name='properties__propert_024184_idx'),
+        ),
+    ]
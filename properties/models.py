@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -112,6 +114,15 @@ class Property(models.Model):
     review_count = models.IntegerField(default=0)
     trust_score = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(100)])
     
+    # Denormalized cover image (kept current by properties.signals)
+    cover_image = models.ForeignKey(
+        'PropertyImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    
     # Agent/Caretaker assignment
     assigned_agent = models.ForeignKey(
         User,
@@ -140,6 +151,7 @@ class Property(models.Model):
             models.Index(fields=['verification_status']),
             models.Index(fields=['estate']),
             models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['created_at', 'id']),  # Keyset pagination
         ]
     
     def __str__(self):
@@ -176,6 +188,15 @@ class PropertyImage(models.Model):
     image = models.ImageField(upload_to='properties/images/')
     is_primary = models.BooleanField(default=False)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+    # Resized copies stored beside the original: {'source': image name, 'webp': {'400': name}, 'jpeg': {...}}
+    variants = models.JSONField(default=dict, blank=True)
+    
+    # Read from the photo's EXIF header (see properties.photo_location)
+    exif_checked = models.BooleanField(default=False)
+    gps_latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    gps_longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    taken_at = models.DateTimeField(null=True, blank=True)
+    location_score = models.IntegerField(null=True, blank=True)  # 0-100 by distance from the property pin
     
     class Meta:
         ordering = ['-is_primary', 'uploaded_at']
@@ -233,6 +254,85 @@ class PropertyAmenity(models.Model):
         unique_together = ['property', 'amenity_type']
 
 
+class PropertySearchDoc(models.Model):
+    """
+    Flat, denormalized listing row for the search APIs - one per available property.
+    Maintained by properties.signals; rebuild with `manage.py rebuild_search_docs`.
+    """
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, primary_key=True, related_name='search_doc')
+    
+    # Display fields
+    name = models.CharField(max_length=200)
+    location = models.CharField(max_length=400)
+    short_description = models.CharField(max_length=210)
+    image_url = models.CharField(max_length=500, blank=True)
+    image_variants = models.JSONField(default=dict, blank=True)  # {'webp': [[width, url], ...], 'jpeg': [...]}
+    search_text = models.TextField(blank=True)  # Full-text body: description, street, landmark
+    
+    # Filter fields (lowercased tokens cover both the location hierarchy and legacy strings)
+    county_name = models.CharField(max_length=100, blank=True)  # Display value for facets
+    county_tokens = models.CharField(max_length=300, blank=True)
+    estate_tokens = models.CharField(max_length=300, blank=True)
+    amenity_tokens = models.CharField(max_length=500, blank=True)
+    listing_type = models.CharField(max_length=20)
+    property_type = models.CharField(max_length=30)
+    price = models.DecimalField(max_digits=12, decimal_places=2)
+    bedrooms = models.IntegerField(default=0)
+    bathrooms = models.IntegerField(default=0)
+    is_verified = models.BooleanField(default=False)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, null=True, blank=True)
+    
+    # Trust signals
+    verification_status = models.CharField(max_length=20)
+    verification_score = models.IntegerField(default=0)
+    rating = models.DecimalField(max_digits=3, decimal_places=2, default=0.0)
+    review_count = models.IntegerField(default=0)
+    trust_score = models.IntegerField(default=0)
+    
+    # Copied from Property so keyset pagination works without a join
+    created_at = models.DateTimeField()
+    # Set by every sync_search_docs write, including changes that never touch
+    # Property.updated_at (images, amenities, renames, queryset updates)
+    indexed_at = models.DateTimeField()
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'property']),
+            models.Index(fields=['indexed_at']),
+            models.Index(fields=['latitude', 'longitude']),
+            models.Index(fields=['price']),
+        ]
+    
+    def __str__(self):
+        return f"Search doc for {self.name}"
+
+
+class PropertyChange(models.Model):
+    """
+    Append-only log of listing changes; the id doubles as the feed sequence number.
+    Written by search.sync_search_docs / remove_search_docs, read by /api/properties/changes/.
+    """
+    ACTION_CHOICES = [
+        ('upsert', 'Upsert'),
+        ('delete', 'Delete'),
+    ]
+    
+    property_id = models.BigIntegerField()  # Not a FK: delete entries outlive the property
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['property_id', 'id']),  # Compaction: newest row per property
+        ]
+    
+    def __str__(self):
+        return f"#{self.id} {self.action} property {self.property_id}"
+
+
 class LocationHierarchy(models.Model):
     """County → Sub-county → Estate hierarchy"""
     county = models.CharField(max_length=100)
@@ -320,3 +420,56 @@ class LandlordApplication(models.Model):
 
     def __str__(self):
         return f"Landlord application for {self.user.username} - {self.status}"
+
+
+class ChunkedUpload(models.Model):
+    """
+    A resumable upload in progress: chunks are written at their offsets into
+    a partial file (see properties.uploads) and `received` tracks progress.
+    """
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='chunked_uploads')
+    filename = models.CharField(max_length=255)  # Client's original name
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)  # Contiguous bytes written from offset 0
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    file_path = models.CharField(max_length=500, blank=True)  # Storage path once complete
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+    
+    def __str__(self):
+        return f"Upload {self.id} ({self.received}/{self.size} bytes)"
+
+
+class MediaBlob(models.Model):
+    """
+    One stored copy of some uploaded bytes, addressed by SHA-256. File fields
+    point at a blob by holding its `file` path; ref_count tracks how many do
+    (see properties.media) and gc_media_blobs deletes blobs nobody uses.
+    """
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    file = models.CharField(max_length=255, unique=True)  # Storage path: uploads/<2 hex>/<sha256><ext>
+    size = models.BigIntegerField()
+    ref_count = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_uploaded_at = models.DateTimeField(auto_now=True)  # Bumped when a re-upload dedups to this blob
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['ref_count', 'last_uploaded_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes, {self.ref_count} refs)"
@@ -0,0 +1,83 @@
+"""
+Keyset (cursor) pagination for listing APIs
+
+Newest-first pages are keyed on (created_at, id), matching
+Property.Meta.ordering, so every page is a bounded index range scan: no OFFSET
+and no COUNT(*). Distance-sorted pages (properties.geo) and relevance-sorted
+pages (properties.search) are keyed on (distance_km, id) and (search_rank, id)
+the same way.
+"""
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 100
+
+# Orders keyed on an ascending annotation, smallest first
+ANNOTATED_ORDERS = {
+    'distance': 'distance_km',
+    'relevance': 'search_rank',
+}
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor we did not issue"""
+
+
+def encode_cursor(obj, order='newest'):
+    """Opaque cursor pointing just past obj"""
+    if order in ANNOTATED_ORDERS:
+        payload = {'k': getattr(obj, ANNOTATED_ORDERS[order]), 'i': obj.pk}
+    else:
+        payload = {'c': obj.created_at.isoformat(), 'i': obj.pk}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, order='newest'):
+    """Return the (sort key, id) pair stored in an opaque cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if order in ANNOTATED_ORDERS:
+            return float(payload['k']), int(payload['i'])
+        return datetime.fromisoformat(payload['c']), int(payload['i'])
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError):
+        raise InvalidCursor(cursor)
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Clamp a page_size query parameter to [1, maximum]"""
+    try:
+        return max(1, min(int(value), maximum))
+    except (TypeError, ValueError):
+        return default
+
+
+def paginate_keyset(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, order='newest'):
+    """
+    Return (rows, next_cursor) for one page of queryset.
+    Annotated orders need the matching annotation on queryset
+    (distance_km from geo.filter_near, search_rank from search.search_properties).
+    Fetches one extra row to know whether another page exists.
+    """
+    if order in ANNOTATED_ORDERS:
+        field = ANNOTATED_ORDERS[order]
+        queryset = queryset.order_by(field, 'pk')
+    else:
+        queryset = queryset.order_by('-created_at', '-pk')
+    if cursor:
+        key, pk = decode_cursor(cursor, order)
+        if order in ANNOTATED_ORDERS:
+            queryset = queryset.filter(Q(**{f'{field}__gt': key}) | Q(**{field: key, 'pk__gt': pk}))
+        else:
+            queryset = queryset.filter(Q(created_at__lt=key) | Q(created_at=key, pk__lt=pk))
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1], order)
+    return rows, next_cursor
@@ -0,0 +1,322 @@
+"""
+Denormalized search documents for property listings
+
+PropertySearchDoc holds everything the listing APIs render, precomputed, so a
+page of results is a single flat query. sync_search_docs() is the only writer:
+signals call it for the properties touched by a change and the
+rebuild_search_docs command calls it for the whole table in chunks.
+
+Full-text search over name, location and body runs on an SQLite FTS5 table
+(properties_search_fts, kept in step by sync_search_docs) or a generated
+PostgreSQL tsvector column with a GIN index; both are created by migration
+0008. Other backends fall back to LIKE matching.
+"""
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from .changes import record_changes
+from .models import Property, PropertySearchDoc
+from .thumbnails import card_url, srcset, variant_urls
+
+FALLBACK_IMAGE_URL = 'https://images.unsplash.com/photo-1545324418-cc1a3fa10c00?w=400&h=300&fit=crop'
+SHORT_DESCRIPTION_LENGTH = 200
+
+FTS_TABLE = 'properties_search_fts'
+MAX_QUERY_TERMS = 8
+# bm25 column weights for (name, location, search_text)
+FTS_WEIGHTS = (10.0, 5.0, 1.0)
+
+DOC_FIELDS = [
+    f.name for f in PropertySearchDoc._meta.concrete_fields if f.name != 'property'
+]
+# Everything but the indexed_at stamp, which only moves when one of these does
+CONTENT_FIELDS = [name for name in DOC_FIELDS if name != 'indexed_at']
+
+
+def docs_queryset():
+    """Properties that should have a search doc, with everything a doc needs"""
+    return Property.objects.filter(available=True).select_related(
+        'cover_image', 'estate', 'estate__ward', 'estate__sub_county', 'estate__sub_county__county'
+    ).prefetch_related('amenities')
+
+
+def _tokens(*values):
+    seen = []
+    for value in values:
+        value = (value or '').strip().lower()
+        if value and value not in seen:
+            seen.append(value)
+    return ' '.join(seen)
+
+
+def _image_url(image):
+    if not image:
+        return ''
+    try:
+        url = image.image.url
+        if not url.startswith('/media/') and not url.startswith('http'):
+            url = f'/media/{image.image.name}'
+        return url
+    except Exception:
+        return ''
+
+
+def _short_description(description):
+    if not description:
+        return 'No description available'
+    if len(description) > SHORT_DESCRIPTION_LENGTH:
+        return description[:SHORT_DESCRIPTION_LENGTH] + '...'
+    return description
+
+
+def build_search_doc(prop):
+    """Unsaved PropertySearchDoc for prop (loaded via docs_queryset())"""
+    estate = prop.estate
+    county_name = estate.sub_county.county.name if estate else ''
+    estate_name = estate.name if estate else ''
+    return PropertySearchDoc(
+        property=prop,
+        name=prop.name or 'Unnamed Property',
+        location=prop.location_string or 'Location not specified',
+        short_description=_short_description(prop.description),
+        image_url=_image_url(prop.cover_image),
+        image_variants=variant_urls(prop.cover_image.variants) if prop.cover_image else {},
+        search_text=' '.join(filter(None, [prop.description, prop.street_address, prop.landmark])),
+        county_name=county_name or prop.county.strip().title(),
+        county_tokens=_tokens(county_name, prop.county),
+        estate_tokens=_tokens(estate_name, prop.estate_name),
+        amenity_tokens=' '.join(sorted(a.amenity_type for a in prop.amenities.all())),
+        listing_type=prop.listing_type,
+        property_type=prop.property_type or 'apartment',
+        price=prop.price or 0,
+        bedrooms=prop.bedrooms or 0,
+        bathrooms=prop.bathrooms or 0,
+        is_verified=prop.is_verified,
+        latitude=prop.latitude,
+        longitude=prop.longitude,
+        verification_status=prop.verification_status,
+        verification_score=prop.verification_score or 0,
+        rating=prop.rating or 0,
+        review_count=prop.review_count or 0,
+        trust_score=prop.trust_score or 0,
+        created_at=prop.created_at,
+        indexed_at=timezone.now(),
+    )
+
+
+def sync_search_docs(property_ids, log_changes=True):
+    """
+    Bring the docs for property_ids in line with their properties: upsert the
+    available ones and drop the rest. Returns the number of docs written.
+    log_changes=False skips the change feed (bulk rebuilds).
+    """
+    property_ids = list(property_ids)
+    if not property_ids:
+        return 0
+    docs = [build_search_doc(prop) for prop in docs_queryset().filter(pk__in=property_ids)]
+    live_ids = {doc.property_id for doc in docs}
+    stale_ids = [pk for pk in property_ids if pk not in live_ids]
+    if stale_ids:
+        PropertySearchDoc.objects.filter(property_id__in=stale_ids).delete()
+    if docs:
+        _keep_unchanged_stamps(docs)
+        PropertySearchDoc.objects.bulk_create(
+            docs,
+            update_conflicts=True,
+            unique_fields=['property'],
+            update_fields=DOC_FIELDS,
+        )
+    if full_text_backend() == 'fts5':
+        _sync_fts(property_ids, docs)
+    if log_changes:
+        record_changes(live_ids, stale_ids)
+    
+    from .caching import bump_listings_version, bump_property_versions
+    bump_listings_version()
+    bump_property_versions(property_ids)
+    return len(docs)
+
+
+def _keep_unchanged_stamps(docs):
+    """
+    Carry indexed_at over for docs whose content matches the stored doc, so a
+    rebuild that changes nothing does not turn every export into a full one.
+    """
+    stored = {
+        row['property']: row
+        for row in PropertySearchDoc.objects.filter(
+            property_id__in=[doc.property_id for doc in docs]
+        ).values('property', 'indexed_at', *CONTENT_FIELDS)
+    }
+    for doc in docs:
+        row = stored.get(doc.property_id)
+        if row and all(getattr(doc, name) == row[name] for name in CONTENT_FIELDS):
+            doc.indexed_at = row['indexed_at']
+
+
+_fts5_available = None
+
+
+def full_text_backend():
+    """'fts5', 'postgresql' or None when only LIKE matching is available"""
+    global _fts5_available
+    if connection.vendor == 'postgresql':
+        return 'postgresql'
+    if connection.vendor != 'sqlite':
+        return None
+    if _fts5_available is None:
+        with connection.cursor() as cursor:
+            _fts5_available = FTS_TABLE in connection.introspection.table_names(cursor)
+    return 'fts5' if _fts5_available else None
+
+
+def _sync_fts(property_ids, docs):
+    """Replace the FTS5 rows for property_ids with the given docs"""
+    with connection.cursor() as cursor:
+        placeholders = ', '.join(['%s'] * len(property_ids))
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})', property_ids)
+        if docs:
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, location, search_text) VALUES (%s, %s, %s, %s)',
+                [(doc.property_id, doc.name, doc.location, doc.search_text) for doc in docs],
+            )
+
+
+def remove_search_docs(property_ids):
+    """Drop index entries that a cascade delete of the doc table leaves behind"""
+    property_ids = list(property_ids)
+    if property_ids and full_text_backend() == 'fts5':
+        _sync_fts(property_ids, [])
+    record_changes(deleted_ids=property_ids)
+    
+    from .caching import bump_listings_version, mark_properties_missing
+    bump_listings_version()
+    mark_properties_missing(property_ids)
+
+
+def prune_full_text_index():
+    """Drop FTS5 rows whose search doc no longer exists"""
+    if full_text_backend() != 'fts5':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {FTS_TABLE} WHERE rowid NOT IN '
+            f'(SELECT property_id FROM {PropertySearchDoc._meta.db_table})'
+        )
+
+
+def query_terms(q):
+    """Lowercased word tokens from user input; punctuation never reaches the query syntax"""
+    return re.findall(r'\w+', (q or '').lower())[:MAX_QUERY_TERMS]
+
+
+def search_properties(queryset, q):
+    """
+    Restrict a PropertySearchDoc queryset to matches for q, every term
+    prefix-matched, annotated with search_rank (lower is more relevant).
+    """
+    terms = query_terms(q)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+    
+    backend = full_text_backend()
+    doc_table = PropertySearchDoc._meta.db_table
+    if backend == 'fts5':
+        match = ' '.join(f'"{term}"*' for term in terms)
+        weights = ', '.join(str(w) for w in FTS_WEIGHTS)
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', [match])
+        ).annotate(search_rank=RawSQL(
+            f'(SELECT bm25({FTS_TABLE}, {weights}) FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s AND rowid = {doc_table}.property_id)',
+            [match],
+            output_field=FloatField(),
+        ))
+    if backend == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        return queryset.filter(RawSQL(
+            f"{doc_table}.search_vector @@ to_tsquery('simple', %s)", [tsquery], output_field=BooleanField()
+        )).annotate(search_rank=RawSQL(
+            f"-ts_rank({doc_table}.search_vector, to_tsquery('simple', %s))", [tsquery], output_field=FloatField()
+        ))
+    
+    # No full-text index: every term must appear somewhere
+    for term in terms:
+        queryset = queryset.filter(
+            Q(name__icontains=term) | Q(location__icontains=term) | Q(search_text__icontains=term)
+        )
+    return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _coordinate(doc, name):
+    if doc.latitude is None or doc.longitude is None:
+        return None
+    return float(getattr(doc, name))
+
+
+# Listing API field -> (search doc columns it reads, value getter)
+LISTING_FIELDS = {
+    'id': (('property',), lambda doc: doc.property_id),
+    'name': (('name',), lambda doc: doc.name),
+    'location': (('location',), lambda doc: doc.location),
+    'price': (('price',), lambda doc: float(doc.price) if doc.price else 0),
+    'bedrooms': (('bedrooms',), lambda doc: doc.bedrooms or 0),
+    'bathrooms': (('bathrooms',), lambda doc: doc.bathrooms or 1),
+    'type': (('property_type',), lambda doc: doc.property_type or 'apartment'),
+    'verified': (('is_verified',), lambda doc: doc.is_verified),
+    'available': ((), lambda doc: True),
+    'rating': (('rating',), lambda doc: float(doc.rating) if doc.rating else 0.0),
+    'reviews': (('review_count',), lambda doc: doc.review_count or 0),
+    'trustScore': (('trust_score',), lambda doc: doc.trust_score or 0),
+    'image': (('image_url',), lambda doc: doc.image_url or FALLBACK_IMAGE_URL),
+    'thumbnail': (
+        ('image_url', 'image_variants'),
+        lambda doc: card_url(doc.image_variants) or doc.image_url or FALLBACK_IMAGE_URL,
+    ),
+    'srcset': (('image_variants',), lambda doc: srcset(doc.image_variants)),
+    'description': (('short_description',), lambda doc: doc.short_description),
+    'verification_status': (('verification_status',), lambda doc: doc.verification_status),
+    'verification_score': (('verification_score',), lambda doc: doc.verification_score or 0),
+    'latitude': (('latitude', 'longitude'), lambda doc: _coordinate(doc, 'latitude')),
+    'longitude': (('latitude', 'longitude'), lambda doc: _coordinate(doc, 'longitude')),
+}
+
+
+def parse_listing_fields(value):
+    """
+    Validate a fields=a,b,c parameter; returns None for "all fields".
+    Raises ValueError naming any unknown field.
+    """
+    if not value:
+        return None
+    fields = []
+    for name in value.split(','):
+        name = name.strip()
+        if name and name not in fields:
+            fields.append(name)
+    unknown = [name for name in fields if name not in LISTING_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields or None
+
+
+def listing_columns(fields):
+    """Search doc columns to load for fields (created_at is always needed for cursors)"""
+    columns = {'created_at'}
+    for name in fields:
+        columns.update(LISTING_FIELDS[name][0])
+    return sorted(columns)
+
+
+def search_doc_to_dict(doc, fields=None):
+    """Listing API representation of a search doc, optionally limited to fields"""
+    return {name: LISTING_FIELDS[name][1](doc) for name in (fields or LISTING_FIELDS)}
+
+
+def search_doc_to_row(doc, fields):
+    """Columnar (array) representation matching the order of fields"""
+    return [LISTING_FIELDS[name][1](doc) for name in fields]
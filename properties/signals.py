@@ -0,0 +1,218 @@
+"""
+Signal handlers that keep denormalized Property data in sync
+"""
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from locations.models import County, SubCounty, Ward, Estate, LocationPin
+from .caching import bump_locations_version, bump_property_versions
+from .dashboard import invalidate_dashboard
+from .estate_counts import counted_estate, move_estate_count
+from .media import BLOB_REFERENCES, acquire_blobs, field_names, release_blobs
+from .models import Booking, Property, PropertyImage, PropertyVideo, PropertyAmenity
+from .search import remove_search_docs, sync_search_docs
+from .thumbnails import queue_variants
+
+
+def refresh_cover_image(property_id):
+    """Point Property.cover_image at the primary image, else the oldest upload"""
+    cover_id = PropertyImage.objects.filter(
+        property_id=property_id
+    ).order_by('-is_primary', 'uploaded_at', 'id').values_list('id', flat=True).first()
+    # update() avoids bumping updated_at and re-firing Property post_save
+    Property.objects.filter(pk=property_id).update(cover_image_id=cover_id)
+
+
+def deleted_directly(instance, origin):
+    """
+    False when instance is being removed by a cascade from its Property (or
+    the Property's owner); the parent row is about to go, so skip the resync.
+    """
+    return isinstance(origin, type(instance)) or getattr(origin, 'model', None) is type(instance)
+
+
+UNKNOWN = object()
+
+
+def _counted_estate(instance):
+    # Read __dict__ so deferred fields are never loaded just for this
+    fields = instance.__dict__
+    if 'estate_id' not in fields or 'available' not in fields:
+        return UNKNOWN
+    return counted_estate(fields['estate_id'], fields['available'])
+
+
+@receiver(post_init, sender=Property)
+def property_loaded(sender, instance, **kwargs):
+    """Remember which estate the stored row counts towards"""
+    instance._counted_estate = _counted_estate(instance)
+
+
+@receiver(post_save, sender=Property)
+def property_saved(sender, instance, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    previous = None if created else instance._counted_estate
+    current = _counted_estate(instance)
+    # Partially loaded instances leave the count to reconcile_estate_counts
+    if previous is not UNKNOWN and current is not UNKNOWN:
+        move_estate_count(previous, current)
+    instance._counted_estate = current
+    sync_search_docs([instance.pk])
+
+
+@receiver(post_delete, sender=Property)
+def property_deleted(sender, instance, **kwargs):
+    if instance._counted_estate is not UNKNOWN:
+        move_estate_count(instance._counted_estate, None)
+    # The doc row cascades with the property; the full-text index does not
+    remove_search_docs([instance.pk])
+
+
+@receiver(post_save, sender=PropertyImage)
+def property_image_saved(sender, instance, raw=False, **kwargs):
+    """Image created, replaced or re-flagged is_primary"""
+    if raw:
+        return
+    refresh_cover_image(instance.property_id)
+    sync_search_docs([instance.property_id])
+    queue_variants(instance)
+
+
+@receiver(post_delete, sender=PropertyImage)
+def property_image_deleted(sender, instance, origin=None, **kwargs):
+    """Image removed"""
+    if not deleted_directly(instance, origin):
+        return
+    refresh_cover_image(instance.property_id)
+    sync_search_docs([instance.property_id])
+
+
+@receiver(post_save, sender=PropertyAmenity)
+def property_amenity_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    sync_search_docs([instance.property_id])
+
+
+@receiver(post_delete, sender=PropertyAmenity)
+def property_amenity_deleted(sender, instance, origin=None, **kwargs):
+    if not deleted_directly(instance, origin):
+        return
+    sync_search_docs([instance.property_id])
+
+
+@receiver(post_save, sender=PropertyVideo)
+@receiver(post_delete, sender=PropertyVideo)
+def property_video_changed(sender, instance, raw=False, **kwargs):
+    # Videos only appear in the detail document
+    if raw:
+        return
+    bump_property_versions([instance.property_id])
+
+
+@receiver(post_save, sender='reviews.Review')
+@receiver(post_delete, sender='reviews.Review')
+def property_review_changed(sender, instance, raw=False, **kwargs):
+    if raw or not instance.property_id:
+        return
+    bump_property_versions([instance.property_id])
+
+
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def property_owner_dashboard_changed(sender, instance, **kwargs):
+    invalidate_dashboard(instance.owner_id)
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+@receiver(post_save, sender='wallet.Wallet')
+@receiver(post_delete, sender='wallet.Wallet')
+def user_dashboard_changed(sender, instance, **kwargs):
+    invalidate_dashboard(instance.user_id)
+
+
+# Location renames change the precomputed location strings and tokens
+LOCATION_LOOKUPS = {
+    Estate: 'estate',
+    Ward: 'estate__ward',
+    SubCounty: 'estate__sub_county',
+    County: 'estate__sub_county__county',
+}
+# Columns the search docs read from each level; other edits (coordinates,
+# is_popular, counts) leave the docs alone
+LOCATION_DOC_FIELDS = {
+    Estate: ['name', 'ward_id', 'sub_county_id'],
+    Ward: ['name'],
+    SubCounty: ['name', 'county_id'],
+    County: ['name'],
+}
+LOCATION_SYNC_CHUNK_SIZE = 500
+
+
+def _location_doc_values(instance):
+    # Read __dict__ so deferred fields are never loaded just for this
+    fields = instance.__dict__
+    return [fields.get(name, UNKNOWN) for name in LOCATION_DOC_FIELDS[type(instance)]]
+
+
+def location_loaded(sender, instance, **kwargs):
+    instance._doc_values = _location_doc_values(instance)
+
+
+def location_saved(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    previous, current = instance._doc_values, _location_doc_values(instance)
+    instance._doc_values = current
+    # A field deferred at load time might have changed, so resync to be safe
+    if previous == current and UNKNOWN not in previous:
+        return
+    property_ids = list(Property.objects.filter(
+        **{LOCATION_LOOKUPS[sender]: instance}
+    ).order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(property_ids), LOCATION_SYNC_CHUNK_SIZE):
+        sync_search_docs(property_ids[start:start + LOCATION_SYNC_CHUNK_SIZE])
+
+
+def location_changed(sender, **kwargs):
+    """Any location write (fixture loads included) invalidates the in-process location indexes"""
+    bump_locations_version()
+
+
+for location_model in LOCATION_LOOKUPS:
+    post_init.connect(location_loaded, sender=location_model, dispatch_uid=f'search_docs_loaded_{location_model.__name__}')
+    post_save.connect(location_saved, sender=location_model, dispatch_uid=f'search_docs_{location_model.__name__}')
+    post_save.connect(location_changed, sender=location_model, dispatch_uid=f'locations_saved_{location_model.__name__}')
+    post_delete.connect(location_changed, sender=location_model, dispatch_uid=f'locations_deleted_{location_model.__name__}')
+
+# Pins only feed the reverse geocoder
+post_save.connect(location_changed, sender=LocationPin, dispatch_uid='locations_saved_LocationPin')
+post_delete.connect(location_changed, sender=LocationPin, dispatch_uid='locations_deleted_LocationPin')
+
+
+# Media blob reference counts: file fields listed in media.BLOB_REFERENCES
+def blob_owner_loaded(sender, instance, **kwargs):
+    instance._blob_names = field_names(instance, BLOB_REFERENCES[sender._meta.label])
+
+
+def blob_owner_saved(sender, instance, raw=False, created=False, **kwargs):
+    if raw:
+        return
+    current = field_names(instance, BLOB_REFERENCES[sender._meta.label])
+    previous = [''] * len(current) if created else instance._blob_names
+    # Deferred (None) fields are left to gc_media_blobs to reconcile
+    changed = [(old, new) for old, new in zip(previous, current) if old != new and None not in (old, new)]
+    acquire_blobs([new for _, new in changed])
+    release_blobs([old for old, _ in changed])
+    instance._blob_names = current
+
+
+def blob_owner_deleted(sender, instance, **kwargs):
+    release_blobs([name for name in instance._blob_names if name])
+
+
+for label in BLOB_REFERENCES:
+    post_init.connect(blob_owner_loaded, sender=label, dispatch_uid=f'blob_loaded_{label}')
+    post_save.connect(blob_owner_saved, sender=label, dispatch_uid=f'blob_saved_{label}')
+    post_delete.connect(blob_owner_deleted, sender=label, dispatch_uid=f'blob_deleted_{label}')
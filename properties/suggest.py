@@ -0,0 +1,231 @@
+"""
+In-process autocomplete index over County, SubCounty, Ward and Estate names
+
+Every word start of every name is a key in a sorted array, so a prefix lookup
+is two bisects and a slice. A character trie over the same keys drives typo
+tolerant lookups: walking it with a Levenshtein row per node finds every key
+prefix within the allowed edit distance, and each of those maps back to a
+bisect range. The index is rebuilt lazily when caching.locations_version()
+moves, which location signals bump on every write, and at least every
+INDEX_MAX_AGE seconds so ranking follows Estate.property_count, which moves
+with every listing without touching the locations version.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from locations.models import County, SubCounty, Ward, Estate
+
+SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 25
+MIN_FUZZY_LENGTH = 3
+# Leading characters that must match exactly before typos are allowed; the
+# first letter is rarely mistyped and pinning it keeps the trie walk small
+FUZZY_PREFIX_LENGTH = 1
+INDEX_MAX_AGE = 300
+
+# Ties between equally ranked names go to the broader area
+KIND_ORDER = {'county': 0, 'sub_county': 1, 'ward': 2, 'estate': 3}
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def normalize(text):
+    return ' '.join(_WORD.findall((text or '').lower()))
+
+
+def max_typos(query):
+    """Edits tolerated for a query of this length"""
+    if len(query) < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if len(query) <= 5 else 2
+
+
+def _coordinate(value):
+    return float(value) if value is not None else None
+
+
+class SuggestIndex:
+    def __init__(self, entries):
+        # entries: dicts with type, id, name, label, popular, property_count, latitude, longitude
+        self.entries = entries
+        keyed = []
+        for position, entry in enumerate(entries):
+            name = normalize(entry['name'])
+            starts = [0] + [m.start() + 1 for m in re.finditer(' ', name)]
+            for start in starts:
+                keyed.append((name[start:], position, start == 0))
+        keyed.sort()
+        self.keys = [key for key, _, _ in keyed]
+        self.postings = [(position, whole) for _, position, whole in keyed]
+        
+        self.trie = {}
+        for key in self.keys:
+            node = self.trie
+            for char in key:
+                node = node.setdefault(char, {})
+
+    def _range(self, prefix):
+        return bisect_left(self.keys, prefix), bisect_right(self.keys, prefix + '\uffff')
+
+    def _fuzzy_prefixes(self, query, max_distance):
+        """(prefix, distance) for every key prefix within max_distance edits of query"""
+        found = []
+        fixed, query = query[:FUZZY_PREFIX_LENGTH], query[FUZZY_PREFIX_LENGTH:]
+        node = self.trie
+        for char in fixed:
+            if char not in node:
+                return found
+            node = node[char]
+        width = len(query) + 1
+        
+        def walk(node, prefix, row, best_above):
+            for char, child in node.items():
+                next_row = [row[0] + 1]
+                for i in range(1, width):
+                    next_row.append(min(
+                        next_row[i - 1] + 1,
+                        row[i] + 1,
+                        row[i - 1] + (query[i - 1] != char),
+                    ))
+                best = best_above
+                # Keys below a matching node match too; only record it again
+                # deeper down if a longer prefix is a closer match
+                if next_row[-1] < best:
+                    found.append((prefix + char, next_row[-1]))
+                    best = next_row[-1]
+                if best and min(next_row) < best:
+                    walk(child, prefix + char, next_row, best)
+        
+        walk(node, fixed, list(range(width)), max_distance + 1)
+        return found
+
+    def suggest(self, query, limit=SUGGEST_LIMIT):
+        query = normalize(query)
+        if not query:
+            return []
+        
+        # match quality per entry: (distance, 0 if the whole name matched else 1)
+        matches = {}
+        
+        def collect(prefix, distance):
+            lo, hi = self._range(prefix)
+            for position, whole in self.postings[lo:hi]:
+                quality = (distance, 0 if whole else 1)
+                if quality < matches.get(position, (99, 99)):
+                    matches[position] = quality
+        
+        collect(query, 0)
+        typos = max_typos(query)
+        if typos and len(matches) < limit:
+            for prefix, distance in self._fuzzy_prefixes(query, typos):
+                if distance:
+                    collect(prefix, distance)
+        
+        def rank(position):
+            entry = self.entries[position]
+            distance, partial = matches[position]
+            return (
+                distance,
+                partial,
+                not entry['popular'],
+                -entry['property_count'],
+                KIND_ORDER[entry['type']],
+                entry['name'],
+            )
+        
+        best = heapq.nsmallest(limit, matches, key=rank)
+        return [
+            dict(self.entries[position], fuzzy=matches[position][0] > 0)
+            for position in best
+        ]
+
+
+def build_entries():
+    """One flat entry per location; four queries, no per-row lookups"""
+    counties = {row['id']: row for row in County.objects.values('id', 'name', 'center_latitude', 'center_longitude')}
+    sub_counties = {row['id']: row for row in SubCounty.objects.values(
+        'id', 'name', 'county_id', 'center_latitude', 'center_longitude'
+    )}
+    wards = {row['id']: row for row in Ward.objects.values(
+        'id', 'name', 'sub_county_id', 'center_latitude', 'center_longitude'
+    )}
+    estates = list(Estate.objects.values(
+        'id', 'name', 'ward_id', 'sub_county_id', 'is_popular', 'property_count',
+        'center_latitude', 'center_longitude',
+    ))
+    
+    # Broader areas rank by the estates inside them
+    totals = {}
+    for estate in estates:
+        sub_county = sub_counties.get(estate['sub_county_id'])
+        parents = [('sub_county', estate['sub_county_id']), ('ward', estate['ward_id'])]
+        if sub_county:
+            parents.append(('county', sub_county['county_id']))
+        for parent in parents:
+            popular, count = totals.get(parent, (False, 0))
+            totals[parent] = (popular or estate['is_popular'], count + estate['property_count'])
+    
+    def entry(kind, row, parents, popular=None, property_count=None):
+        rolled_popular, rolled_count = totals.get((kind, row['id']), (False, 0))
+        names = [row['name']] + [parent['name'] for parent in parents if parent]
+        return {
+            'type': kind,
+            'id': row['id'],
+            'name': row['name'],
+            'label': ', '.join(names),
+            'popular': rolled_popular if popular is None else popular,
+            'property_count': rolled_count if property_count is None else property_count,
+            'latitude': _coordinate(row['center_latitude']),
+            'longitude': _coordinate(row['center_longitude']),
+        }
+    
+    entries = [entry('county', county, []) for county in counties.values()]
+    for sub_county in sub_counties.values():
+        entries.append(entry('sub_county', sub_county, [counties.get(sub_county['county_id'])]))
+    for ward in wards.values():
+        sub_county = sub_counties.get(ward['sub_county_id'])
+        county = counties.get(sub_county['county_id']) if sub_county else None
+        entries.append(entry('ward', ward, [sub_county, county]))
+    for estate in estates:
+        sub_county = sub_counties.get(estate['sub_county_id'])
+        county = counties.get(sub_county['county_id']) if sub_county else None
+        entries.append(entry(
+            'estate', estate, [wards.get(estate['ward_id']), sub_county, county],
+            popular=estate['is_popular'], property_count=estate['property_count'],
+        ))
+    return entries
+
+
+_index = None
+_index_version = None
+_index_built_at = 0.0
+_index_lock = threading.Lock()
+
+
+def _index_is_current(version):
+    return (
+        _index is not None and _index_version == version
+        and time.monotonic() - _index_built_at < INDEX_MAX_AGE
+    )
+
+
+def get_suggest_index():
+    """The process-wide index, rebuilt when the location tables have changed or it has aged out"""
+    global _index, _index_version, _index_built_at
+    from .caching import locations_version
+    
+    version = locations_version()
+    if not _index_is_current(version):
+        with _index_lock:
+            if not _index_is_current(version):
+                _index = SuggestIndex(build_entries())
+                _index_version = version
+                _index_built_at = time.monotonic()
+    return _index
+
+
+def suggest_locations(query, limit=SUGGEST_LIMIT):
+    return get_suggest_index().suggest(query, limit)
@@ -0,0 +1,1121 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import ExifTags, Image
+
+from locations.models import County, SubCounty, Ward, Estate, LocationPin
+from . import suggest
+from .admin_stats import admin_stats
+from .caching import PROPERTY_MISSING, STATS_KEYS, cache_stats
+from .changes import COMMIT_LAG
+from .geocode import reverse_geocode
+from .media import delete_blob
+from .models import (
+    Booking, ChunkedUpload, LandlordApplication, MediaBlob, Property, PropertyAmenity, PropertyChange,
+    PropertyImage, PropertySearchDoc, PropertyVideo,
+)
+from .search import sync_search_docs
+from .uploads import OffsetMismatch, finalize_upload, write_chunk
+
+
+def make_property(owner, name='Test Property', **kwargs):
+    defaults = {
+        'owner': owner,
+        'name': name,
+        'description': 'A test listing',
+        'price': Decimal('25000'),
+        'county': 'Nairobi',
+        'estate_name': 'Kilimani',
+    }
+    defaults.update(kwargs)
+    return Property.objects.create(**defaults)
+
+
+class CoverImageTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        self.prop = make_property(self.owner)
+
+    def test_first_image_becomes_cover(self):
+        image = PropertyImage.objects.create(property=self.prop, image='properties/images/a.jpg')
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.cover_image_id, image.id)
+
+    def test_primary_image_wins_and_delete_falls_back(self):
+        first = PropertyImage.objects.create(property=self.prop, image='properties/images/a.jpg')
+        primary = PropertyImage.objects.create(property=self.prop, image='properties/images/b.jpg')
+        primary.is_primary = True
+        primary.save()
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.cover_image_id, primary.id)
+
+        primary.delete()
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.cover_image_id, first.id)
+
+        first.delete()
+        self.prop.refresh_from_db()
+        self.assertIsNone(self.prop.cover_image_id)
+
+
+class ApiPropertiesQueryCountTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+
+    def add_properties(self, count):
+        for i in range(count):
+            prop = make_property(self.owner, name=f'Property {i}')
+            PropertyImage.objects.create(property=prop, image=f'properties/images/{i}a.jpg')
+            PropertyImage.objects.create(property=prop, image=f'properties/images/{i}b.jpg', is_primary=True)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('api_properties'))
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        self.add_properties(2)
+        small, _ = self.count_queries()
+
+        self.add_properties(20)
+        large, data = self.count_queries()
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 3)
+        self.assertEqual(len(data['properties']), 22)
+        self.assertTrue(all(p['image'].endswith('b.jpg') for p in data['properties']))
+
+
+class ApiPropertiesPaginationTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        for i in range(5):
+            make_property(self.owner, name=f'Property {i}')
+
+    def test_cursor_walks_every_row_once(self):
+        seen = []
+        url = reverse('api_properties') + '?page_size=2'
+        cursor = None
+        while True:
+            response = self.client.get(url + (f'&cursor={cursor}' if cursor else ''))
+            data = response.json()
+            seen.extend(p['id'] for p in data['properties'])
+            cursor = data['next']
+            if not cursor:
+                break
+        self.assertEqual(len(seen), 5)
+        self.assertEqual(seen, sorted(seen, reverse=True))
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse('api_properties') + '?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+
+class ApiPropertiesGeoTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        # Kilimani, Westlands (~3.5km away) and Mombasa (~440km away)
+        self.kilimani = make_property(self.owner, name='Kilimani', latitude=Decimal('-1.2921'), longitude=Decimal('36.7856'))
+        self.westlands = make_property(self.owner, name='Westlands', latitude=Decimal('-1.2656'), longitude=Decimal('36.8025'))
+        self.mombasa = make_property(self.owner, name='Nyali', latitude=Decimal('-4.0435'), longitude=Decimal('39.6682'))
+
+    def ids(self, query):
+        response = self.client.get(reverse('api_properties') + query)
+        self.assertEqual(response.status_code, 200)
+        return [p['id'] for p in response.json()['properties']]
+
+    def test_bbox_filters_to_viewport(self):
+        ids = self.ids('?bbox=36.6,-1.4,37.0,-1.2')
+        self.assertCountEqual(ids, [self.kilimani.id, self.westlands.id])
+
+    def test_near_sorted_by_distance(self):
+        ids = self.ids('?near=-1.2650,36.8030&radius_km=10&sort=distance')
+        self.assertEqual(ids, [self.westlands.id, self.kilimani.id])
+
+    def test_near_paginates_by_distance(self):
+        first = self.client.get(reverse('api_properties') + '?near=-1.2650,36.8030&radius_km=500&sort=distance&page_size=2').json()
+        self.assertEqual([p['id'] for p in first['properties']], [self.westlands.id, self.kilimani.id])
+        rest = self.ids(f"?near=-1.2650,36.8030&radius_km=500&sort=distance&page_size=2&cursor={first['next']}")
+        self.assertEqual(rest, [self.mombasa.id])
+
+    def test_invalid_bbox_is_rejected(self):
+        response = self.client.get(reverse('api_properties') + '?bbox=1,2,3')
+        self.assertEqual(response.status_code, 400)
+
+
+class ApiPropertyClustersTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        make_property(self.owner, name='Kilimani', price=Decimal('30000'), latitude=Decimal('-1.2921'), longitude=Decimal('36.7856'))
+        make_property(self.owner, name='Westlands', price=Decimal('50000'), latitude=Decimal('-1.2656'), longitude=Decimal('36.8025'))
+        make_property(self.owner, name='Nyali', price=Decimal('40000'), latitude=Decimal('-4.0435'), longitude=Decimal('39.6682'))
+        self.url = reverse('api_property_clusters') + '?bbox=33.9,-4.7,41.9,5.5&zoom=5'
+
+    def test_nearby_listings_share_a_cluster(self):
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['count'], 3)
+        nairobi = [c for c in data['clusters'] if c['count'] == 2]
+        self.assertEqual(len(nairobi), 1)
+        self.assertEqual((nairobi[0]['min_price'], nairobi[0]['max_price']), (30000.0, 50000.0))
+
+    def test_second_request_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data['count'], 3)
+
+    def test_missing_zoom_is_rejected(self):
+        response = self.client.get(reverse('api_property_clusters') + '?bbox=33.9,-4.7,41.9,5.5')
+        self.assertEqual(response.status_code, 400)
+
+
+class PropertySearchDocTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        county = County.objects.create(name='Nairobi', code='047')
+        sub_county = SubCounty.objects.create(county=county, name='Dagoretti North')
+        self.estate = Estate.objects.create(sub_county=sub_county, name='Kilimani')
+        self.prop = make_property(self.owner, estate=self.estate, county='', estate_name='')
+
+    def test_doc_follows_availability(self):
+        self.assertTrue(PropertySearchDoc.objects.filter(property=self.prop).exists())
+        self.prop.available = False
+        self.prop.save()
+        self.assertFalse(PropertySearchDoc.objects.filter(property=self.prop).exists())
+
+    def test_estate_rename_updates_location(self):
+        self.estate.name = 'Kilimani North'
+        self.estate.save()
+        doc = PropertySearchDoc.objects.get(property=self.prop)
+        self.assertEqual(doc.location, 'Kilimani North, Dagoretti North, Nairobi')
+        self.assertEqual(doc.estate_tokens, 'kilimani north')
+
+    def test_location_edits_that_do_not_reach_docs_skip_the_resync(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.estate.is_popular = True
+            self.estate.save()
+            county = County.objects.get()
+            county.center_latitude = Decimal('-1.2864')
+            county.save()
+        self.assertFalse(any('properties_propertysearchdoc' in q['sql'] for q in ctx.captured_queries))
+        county.name = 'Nairobi City'
+        county.save()
+        self.assertEqual(PropertySearchDoc.objects.get(property=self.prop).county_name, 'Nairobi City')
+
+    def test_amenities_and_county_filter(self):
+        PropertyAmenity.objects.create(property=self.prop, amenity_type='parking')
+        self.assertEqual(PropertySearchDoc.objects.get(property=self.prop).amenity_tokens, 'parking')
+        data = self.client.get(reverse('api_properties') + '?county=NAIROBI').json()
+        self.assertEqual([p['id'] for p in data['properties']], [self.prop.id])
+
+    def test_deleting_property_removes_doc(self):
+        PropertyImage.objects.create(property=self.prop, image='properties/images/a.jpg')
+        self.prop.delete()
+        self.assertFalse(PropertySearchDoc.objects.exists())
+
+    def test_rebuild_command(self):
+        PropertySearchDoc.objects.all().delete()
+        call_command('rebuild_search_docs', stdout=StringIO())
+        self.assertEqual(PropertySearchDoc.objects.get().location, 'Kilimani, Dagoretti North, Nairobi')
+
+
+class ApiPropertiesFullTextTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        self.garden = make_property(self.owner, name='Garden Court', description='Quiet compound near Yaya Centre')
+        self.loft = make_property(self.owner, name='City Loft', description='Overlooks the garden and pool')
+        self.other = make_property(self.owner, name='Sunrise Flats', description='Close to the CBD')
+
+    def ids(self, query):
+        response = self.client.get(reverse('api_properties') + query)
+        self.assertEqual(response.status_code, 200)
+        return [p['id'] for p in response.json()['properties']]
+
+    def test_name_matches_rank_above_description_matches(self):
+        self.assertEqual(self.ids('?q=garden'), [self.garden.id, self.loft.id])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.ids('?q=yay'), [self.garden.id])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.other.description = 'Now with a rooftop garden'
+        self.other.save()
+        self.assertIn(self.other.id, self.ids('?q=rooftop'))
+        self.other.delete()
+        self.assertEqual(self.ids('?q=rooftop'), [])
+
+
+class ApiPropertiesFacetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        make_property(self.owner, name='A', bedrooms=1, price=Decimal('15000'), county='Nairobi')
+        make_property(self.owner, name='B', bedrooms=2, price=Decimal('45000'), county='Nairobi', property_type='house')
+        make_property(self.owner, name='C', bedrooms=5, price=Decimal('45000'), county='Mombasa')
+
+    def test_facets_in_one_query(self):
+        url = reverse('api_properties') + '?facets=true&page_size=1'
+        with self.assertNumQueries(2):
+            facets = self.client.get(url).json()['facets']
+        self.assertEqual(facets['total'], 3)
+        self.assertEqual(facets['county'], [{'value': 'Nairobi', 'count': 2}, {'value': 'Mombasa', 'count': 1}])
+        self.assertEqual({b['label']: b['count'] for b in facets['bedrooms']}, {'0': 0, '1': 1, '2': 1, '3': 0, '4+': 1})
+        self.assertEqual({b['min']: b['count'] for b in facets['price'] if b['count']}, {10000: 1, 30000: 2})
+        self.assertEqual(facets['property_type'][0], {'value': 'apartment', 'label': 'Apartment', 'count': 2})
+
+    def test_facets_respect_filters_and_cache(self):
+        url = reverse('api_properties') + '?facets=1&county=nairobi'
+        self.assertEqual(self.client.get(url).json()['facets']['total'], 2)
+        # A different page misses the response cache but reuses the facets
+        with self.assertNumQueries(1):
+            self.client.get(reverse('api_properties') + '?county=Nairobi&facets=1&page_size=5')
+
+
+class ApiPropertiesResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        self.prop = make_property(self.owner)
+        self.url = reverse('api_properties') + '?county=Nairobi'
+
+    def test_repeat_request_is_a_cache_hit(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('api_properties') + '?county=nairobi')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.content, second.content)
+
+    def test_revalidation_answers_304_until_a_write(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        PropertyAmenity.objects.create(property=self.prop, amenity_type='wifi')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    def test_hits_are_counted_without_a_cache_write_per_request(self):
+        cache_stats()  # Flush counts left by earlier tests in this process
+        cache.clear()
+        self.client.get(self.url)
+        self.client.get(self.url)
+        self.assertIsNone(cache.get(STATS_KEYS['hit']))
+        self.assertEqual((cache_stats()['hits'], cache_stats()['misses']), (1, 1))
+
+
+class ApiPropertyDetailTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('landlord', password='pass12345', first_name='Jane', last_name='Wanjiru')
+        self.prop = make_property(self.owner)
+        for i in range(3):
+            PropertyImage.objects.create(property=self.prop, image=f'properties/images/{i}.jpg')
+        PropertyAmenity.objects.create(property=self.prop, amenity_type='parking')
+        self.url = reverse('api_property_detail', args=[self.prop.id])
+
+    def test_document_in_bounded_queries_then_cached(self):
+        # Property + 3 prefetches + review aggregate (recent reviews skipped when there are none)
+        with self.assertNumQueries(5):
+            data = self.client.get(self.url).json()
+        self.assertEqual(len(data['images']), 3)
+        self.assertEqual(data['amenities'], [{'type': 'parking', 'label': 'Parking'}])
+        self.assertEqual(data['owner']['name'], 'Jane Wanjiru')
+        self.assertEqual(data['reviews']['count'], 0)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_conditional_get_and_invalidation(self):
+        etag = self.client.get(self.url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        PropertyVideo.objects.create(property=self.prop, video='properties/videos/tour.mp4')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['videos']), 1)
+
+    def test_missing_property(self):
+        url = reverse('api_property_detail', args=[999999])
+        self.assertEqual(self.client.get(url).status_code, 404)
+        # Remembered briefly, and never answered with a 304
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+        self.assertEqual(cache.get('property_detail:version:999999'), PROPERTY_MISSING)
+        
+        self.prop.delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+
+class ApiPropertiesEncodingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        for i in range(30):
+            make_property(self.owner, name=f'Property {i}', description='Spacious and bright ' * 10,
+                          latitude=Decimal('-1.29'), longitude=Decimal('36.78'))
+
+    def test_sparse_fields(self):
+        data = self.client.get(reverse('api_properties') + '?fields=id,price,latitude,longitude').json()
+        self.assertEqual(set(data['properties'][0]), {'id', 'price', 'latitude', 'longitude'})
+        response = self.client.get(reverse('api_properties') + '?fields=id,owner')
+        self.assertEqual(response.status_code, 400)
+
+    def test_columnar_format(self):
+        data = self.client.get(reverse('api_properties') + '?fields=id,price&format=columns').json()
+        self.assertEqual(data['fields'], ['id', 'price'])
+        self.assertEqual(len(data['rows']), 30)
+        self.assertEqual(data['rows'][0][1], 25000.0)
+
+    def test_gzip_negotiation(self):
+        response = self.client.get(reverse('api_properties'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        plain = self.client.get(reverse('api_properties'))
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+
+class ApiPropertiesExportTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        self.nairobi = make_property(self.owner, name='Nairobi flat', county='Nairobi')
+        self.mombasa = make_property(self.owner, name='Mombasa flat', county='Mombasa')
+        self.url = reverse('api_properties_export')
+
+    def test_requires_authentication(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_ndjson_with_filters(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(self.url + '?county=nairobi&fields=id,name')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        row = json.loads(lines[0])
+        self.assertEqual((row['id'], row['name']), (self.nairobi.id, 'Nairobi flat'))
+        self.assertIn('updated_at', row)
+
+    def test_csv_and_updated_since(self):
+        self.client.force_login(self.owner)
+        future = (timezone.now() + timedelta(days=1)).isoformat()
+        response = self.client.get(self.url, {'format': 'csv', 'fields': 'id', 'updated_since': future})
+        self.assertEqual(b''.join(response.streaming_content).decode().splitlines(), ['id,updated_at'])
+
+    def test_updated_since_sees_changes_made_without_property_save(self):
+        self.client.force_login(self.owner)
+        since = timezone.now().isoformat()
+        # Admin-style approval and a new amenity leave Property.updated_at alone
+        Property.objects.filter(pk=self.mombasa.pk).update(verification_status='approved')
+        sync_search_docs([self.mombasa.pk])
+        PropertyAmenity.objects.create(property=self.nairobi, amenity_type='wifi')
+        response = self.client.get(self.url, {'fields': 'id,verification_status', 'updated_since': since})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(
+            [(row['id'], row['verification_status']) for row in rows],
+            [(self.nairobi.id, 'pending'), (self.mombasa.id, 'approved')],
+        )
+
+    def test_rebuild_without_changes_keeps_updated_since_incremental(self):
+        self.client.force_login(self.owner)
+        since = timezone.now().isoformat()
+        call_command('rebuild_search_docs', stdout=StringIO())
+        response = self.client.get(self.url, {'fields': 'id', 'updated_since': since})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_command_writes_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'export.ndjson')
+            call_command('export_properties', path, '--filter', 'county=Mombasa', stdout=StringIO())
+            with open(path) as handle:
+                self.assertEqual([json.loads(line)['id'] for line in handle], [self.mombasa.id])
+
+
+class ApiPropertyChangesTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        self.url = reverse('api_property_changes')
+
+    def settle(self):
+        """Age the log past the commit lag so the feed serves it"""
+        PropertyChange.objects.update(created_at=timezone.now() - COMMIT_LAG - timedelta(seconds=1))
+
+    def test_feed_collapses_upserts_and_reports_deletes(self):
+        kept = make_property(self.owner, name='Kept')
+        gone = make_property(self.owner, name='Gone')
+        PropertyAmenity.objects.create(property=kept, amenity_type='wifi')
+        gone_id = gone.id
+        gone.delete()
+        self.settle()
+        
+        data = self.client.get(self.url).json()
+        self.assertEqual([row['id'] for row in data['upserts']], [kept.id])
+        self.assertEqual(data['upserts'][0]['listing']['name'], 'Kept')
+        self.assertEqual([row['id'] for row in data['deletes']], [gone_id])
+        self.assertFalse(data['has_more'])
+        
+        # Nothing new after the returned sequence
+        data = self.client.get(self.url, {'since': data['next_since']}).json()
+        self.assertEqual((data['upserts'], data['deletes']), ([], []))
+
+    def test_batches_with_has_more(self):
+        first = make_property(self.owner, name='First')
+        make_property(self.owner, name='Second')
+        self.settle()
+        data = self.client.get(self.url, {'limit': 1}).json()
+        self.assertTrue(data['has_more'])
+        self.assertEqual([row['id'] for row in data['upserts']], [first.id])
+        data = self.client.get(self.url, {'since': data['next_since'], 'limit': 1}).json()
+        self.assertEqual([row['listing']['name'] for row in data['upserts']], ['Second'])
+        self.assertFalse(data['has_more'])
+
+    def test_recent_changes_wait_for_the_commit_lag(self):
+        make_property(self.owner, name='Fresh')
+        data = self.client.get(self.url).json()
+        self.assertEqual((data['upserts'], data['next_since']), ([], 0))
+        self.settle()
+        self.assertEqual(len(self.client.get(self.url).json()['upserts']), 1)
+
+    def test_batch_ends_before_the_first_unsettled_change(self):
+        make_property(self.owner, name='Settled')
+        self.settle()
+        make_property(self.owner, name='Fresh')
+        make_property(self.owner, name='Later')
+        # Only the newest row has aged: it must wait behind the fresh one
+        last = PropertyChange.objects.latest('id')
+        PropertyChange.objects.filter(pk=last.pk).update(created_at=timezone.now() - COMMIT_LAG * 2)
+        data = self.client.get(self.url).json()
+        self.assertEqual([row['listing']['name'] for row in data['upserts']], ['Settled'])
+        self.assertFalse(data['has_more'])
+
+    def test_compaction_keeps_newest_row_per_property(self):
+        prop = make_property(self.owner, name='Edited')
+        prop.name = 'Edited again'
+        prop.save()
+        make_property(self.owner, name='Untouched')
+        self.settle()
+        out = StringIO()
+        call_command('prune_property_changes', days=0, stdout=out)
+        self.assertIn('Removed 1 superseded', out.getvalue())
+        self.assertEqual(sorted(PropertyChange.objects.values_list('property_id', flat=True)), sorted(
+            Property.objects.values_list('pk', flat=True)
+        ))
+
+    def test_rejects_bad_since(self):
+        self.assertEqual(self.client.get(self.url, {'since': 'yesterday'}).status_code, 400)
+
+
+class LocationSuggestTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.nairobi = County.objects.create(name='Nairobi', code='047')
+        self.dagoretti = SubCounty.objects.create(county=self.nairobi, name='Dagoretti North')
+        self.kilimani = Estate.objects.create(sub_county=self.dagoretti, name='Kilimani', property_count=40)
+        self.kileleshwa = Estate.objects.create(sub_county=self.dagoretti, name='Kileleshwa', is_popular=True, property_count=5)
+        self.url = reverse('api_location_suggest')
+
+    def suggest(self, q):
+        return self.client.get(self.url, {'q': q}).json()['suggestions']
+
+    def test_prefix_ranks_popular_then_property_count(self):
+        names = [s['name'] for s in self.suggest('kil')]
+        self.assertEqual(names, ['Kileleshwa', 'Kilimani'])
+        self.assertEqual(self.suggest('kilim')[0]['label'], 'Kilimani, Dagoretti North, Nairobi')
+
+    def test_matches_later_words_and_all_levels(self):
+        suggestions = self.suggest('north')
+        self.assertEqual([(s['type'], s['name']) for s in suggestions], [('sub_county', 'Dagoretti North')])
+        self.assertEqual(self.suggest('nai')[0]['type'], 'county')
+
+    def test_tolerates_typos(self):
+        suggestion = self.suggest('kilimanu')[0]
+        self.assertEqual(suggestion['name'], 'Kilimani')
+        self.assertTrue(suggestion['fuzzy'])
+        self.assertEqual(self.suggest('xyz'), [])
+
+    def test_index_rebuilds_when_locations_change(self):
+        self.assertEqual(self.suggest('lav'), [])
+        Estate.objects.create(sub_county=self.dagoretti, name='Lavington')
+        self.assertEqual([s['name'] for s in self.suggest('lav')], ['Lavington'])
+
+    def test_ranking_follows_property_counts_once_the_index_ages_out(self):
+        self.kileleshwa.is_popular = False
+        self.kileleshwa.save()
+        self.assertEqual([s['name'] for s in self.suggest('kil')], ['Kilimani', 'Kileleshwa'])
+        # Listings move counts through update(), which leaves the locations version alone
+        Estate.objects.filter(pk=self.kileleshwa.pk).update(property_count=90)
+        with mock.patch('properties.suggest.time.monotonic', return_value=time.monotonic() + suggest.INDEX_MAX_AGE):
+            self.assertEqual([s['name'] for s in self.suggest('kil')], ['Kileleshwa', 'Kilimani'])
+
+
+class LocationTreeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        nairobi = County.objects.create(name='Nairobi', code='047')
+        dagoretti = SubCounty.objects.create(county=nairobi, name='Dagoretti North')
+        kilimani_ward = Ward.objects.create(sub_county=dagoretti, name='Kilimani Ward')
+        Estate.objects.create(sub_county=dagoretti, ward=kilimani_ward, name='Kilimani')
+        Estate.objects.create(sub_county=dagoretti, name='Lavington')
+        self.url = reverse('api_locations')
+
+    def test_nested_tree_in_constant_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get(self.url).json()
+        self.assertEqual(len(queries), 4)
+        sub_county = data['counties'][0]['sub_counties'][0]
+        self.assertEqual([e['name'] for e in sub_county['estates']], ['Lavington'])
+        self.assertEqual([e['name'] for e in sub_county['wards'][0]['estates']], ['Kilimani'])
+        
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_strong_etag_revalidates_until_locations_change(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertIn('max-age', response['Cache-Control'])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        
+        County.objects.create(name='Mombasa', code='001')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['counties']), 2)
+
+
+class ReverseGeocodeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        nairobi = County.objects.create(name='Nairobi', code='047')
+        dagoretti = SubCounty.objects.create(county=nairobi, name='Dagoretti North')
+        self.kilimani = Estate.objects.create(
+            sub_county=dagoretti, name='Kilimani',
+            center_latitude=Decimal('-1.2921'), center_longitude=Decimal('36.7850'),
+        )
+        self.lavington = Estate.objects.create(
+            sub_county=dagoretti, name='Lavington',
+            center_latitude=Decimal('-1.2780'), center_longitude=Decimal('36.7700'),
+        )
+
+    def test_nearest_estate_within_range(self):
+        self.assertEqual(reverse_geocode(-1.2900, 36.7860), self.kilimani.id)
+        self.assertEqual(reverse_geocode(-1.2790, 36.7690), self.lavington.id)
+        # Mombasa is hundreds of km from any known estate
+        self.assertIsNone(reverse_geocode(-4.0435, 39.6682))
+
+    def test_refreshes_when_pins_change(self):
+        self.assertIsNone(reverse_geocode(-1.2500, 36.7000, max_km=1))
+        LocationPin.objects.create(estate=self.lavington, latitude=Decimal('-1.2505'), longitude=Decimal('36.7003'))
+        self.assertEqual(reverse_geocode(-1.2500, 36.7000, max_km=1), self.lavington.id)
+
+    def test_submit_links_estate_from_gps(self):
+        landlord = User.objects.create_user('landlord', password='pass12345')
+        LandlordApplication.objects.create(
+            user=landlord, full_name='Land Lord', email='ll@example.com', phone='0700000000',
+            id_document='landlords/ids/id.pdf', status='approved',
+        )
+        self.client.force_login(landlord)
+        response = self.client.post(reverse('api_submit_property'), json.dumps({
+            'name': 'GPS flat', 'price': 30000, 'latitude': -1.2915, 'longitude': 36.7855,
+        }), content_type='application/json')
+        self.assertEqual(response.json()['property']['estate_id'], self.kilimani.id)
+        self.assertEqual(Property.objects.get(name='GPS flat').estate, self.kilimani)
+
+
+class LinkPropertyLocationsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        nairobi = County.objects.create(name='Nairobi', code='047')
+        kiambu = County.objects.create(name='Kiambu', code='022')
+        self.kilimani = Estate.objects.create(
+            sub_county=SubCounty.objects.create(county=nairobi, name='Dagoretti North'), name='Kilimani'
+        )
+        self.ruaka_nairobi = Estate.objects.create(
+            sub_county=SubCounty.objects.create(county=nairobi, name='Westlands'), name='Ruaka'
+        )
+        self.ruaka_kiambu = Estate.objects.create(
+            sub_county=SubCounty.objects.create(county=kiambu, name='Kiambaa'), name='Ruaka'
+        )
+
+    def test_links_exact_fuzzy_and_disambiguated_rows(self):
+        exact = make_property(self.owner, name='Exact', county='Nairobi', estate_name='Kilimani Estate')
+        typo = make_property(self.owner, name='Typo', county='nairobi county', estate_name='Kilimanii')
+        by_county = make_property(self.owner, name='By county', county='Kiambu', estate_name='ruaka')
+        ambiguous = make_property(self.owner, name='Ambiguous', county='', estate_name='Ruaka')
+        
+        out = StringIO()
+        call_command('link_property_locations', stdout=out)
+        
+        linked = dict(Property.objects.values_list('pk', 'estate_id'))
+        self.assertEqual(linked[exact.pk], self.kilimani.pk)
+        self.assertEqual(linked[typo.pk], self.kilimani.pk)
+        self.assertEqual(linked[by_county.pk], self.ruaka_kiambu.pk)
+        self.assertIsNone(linked[ambiguous.pk])
+        self.assertIn(f'unmatched #{ambiguous.pk}', out.getvalue())
+        # Search docs pick up the hierarchy
+        self.assertEqual(PropertySearchDoc.objects.get(pk=typo.pk).estate_tokens, 'kilimani kilimanii')
+
+    def test_dry_run_and_resume(self):
+        first = make_property(self.owner, name='First', estate_name='Kilimani')
+        second = make_property(self.owner, name='Second', estate_name='Kilimani')
+        call_command('link_property_locations', '--dry-run', stdout=StringIO())
+        self.assertFalse(Property.objects.filter(estate__isnull=False).exists())
+        
+        call_command('link_property_locations', '--after-id', str(first.pk), stdout=StringIO())
+        self.assertEqual(
+            list(Property.objects.filter(estate__isnull=False).values_list('pk', flat=True)), [second.pk]
+        )
+
+
+class EstatePropertyCountTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+        sub_county = SubCounty.objects.create(
+            county=County.objects.create(name='Nairobi', code='047'), name='Dagoretti North'
+        )
+        self.kilimani = Estate.objects.create(sub_county=sub_county, name='Kilimani')
+        self.lavington = Estate.objects.create(sub_county=sub_county, name='Lavington')
+
+    def counts(self):
+        return dict(Estate.objects.values_list('name', 'property_count'))
+
+    def test_counts_follow_create_move_unlist_and_delete(self):
+        prop = make_property(self.owner, estate=self.kilimani)
+        make_property(self.owner, name='Other', estate=self.kilimani)
+        self.assertEqual(self.counts(), {'Kilimani': 2, 'Lavington': 0})
+        
+        prop = Property.objects.get(pk=prop.pk)
+        prop.estate = self.lavington
+        prop.save()
+        self.assertEqual(self.counts(), {'Kilimani': 1, 'Lavington': 1})
+        
+        prop.available = False
+        prop.save()
+        self.assertEqual(self.counts(), {'Kilimani': 1, 'Lavington': 0})
+        
+        Property.objects.filter(name='Other').delete()
+        self.assertEqual(self.counts(), {'Kilimani': 0, 'Lavington': 0})
+
+    def test_reconcile_fixes_drift_and_popular_list(self):
+        make_property(self.owner, estate=self.lavington)
+        Property.objects.update(estate=self.kilimani)  # Bypasses signals
+        out = StringIO()
+        call_command('reconcile_estate_counts', stdout=out)
+        self.assertIn('on 2 estates', out.getvalue())
+        self.assertEqual(self.counts(), {'Kilimani': 1, 'Lavington': 0})
+        
+        areas = self.client.get(reverse('api_popular_locations')).json()['areas']
+        self.assertEqual([(a['name'], a['property_count']) for a in areas], [('Kilimani', 1)])
+
+
+class LoadLocationsTests(TestCase):
+    def write(self, tmp, name, content):
+        path = os.path.join(tmp, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def test_csv_upserts_hierarchy_in_batches(self):
+        existing = County.objects.create(name='Nairobi', code='047')
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.write(tmp, 'kenya.csv', (
+                'county,county_code,sub_county,ward,estate,latitude,longitude\n'
+                'nairobi,,,,,-1.2864,36.8172\n'
+                'Nairobi,,Dagoretti North,Kilimani,,-1.2900,36.7850\n'
+                'Nairobi,,Dagoretti North,Kilimani,Kilimani,-1.2921,36.7850\n'
+                'Nairobi,,Dagoretti North,,Lavington,-1.2780,36.7700\n'
+                'Kiambu,022,Kiambaa,,Ruaka,-1.2050,36.7800\n'
+            ))
+            call_command('load_locations', path, '--batch-size', '2', stdout=StringIO())
+            # Re-running is an idempotent upsert
+            call_command('load_locations', path, stdout=StringIO())
+        
+        nairobi = County.objects.get(pk=existing.pk)
+        self.assertEqual((nairobi.code, str(nairobi.center_latitude)), ('047', '-1.286400'))
+        self.assertEqual(County.objects.get(name='Kiambu').code, '022')
+        self.assertEqual(County.objects.count(), 2)
+        self.assertEqual(Ward.objects.get().name, 'Kilimani')
+        kilimani = Estate.objects.get(name='Kilimani')
+        self.assertEqual(kilimani.ward.name, 'Kilimani')
+        self.assertEqual(str(kilimani.center_latitude), '-1.292100')
+        self.assertIsNone(Estate.objects.get(name='Lavington').ward)
+        self.assertEqual(Estate.objects.count(), 3)
+
+    def test_geojson_points(self):
+        collection = {'type': 'FeatureCollection', 'features': [{
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [39.7100, -4.0200]},
+            'properties': {'county': 'Mombasa', 'county_code': '001', 'sub_county': 'Nyali', 'estate': 'Nyali'},
+        }]}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = self.write(tmp, 'coast.geojson', json.dumps(collection))
+            call_command('load_locations', path, stdout=StringIO())
+        estate = Estate.objects.get(name='Nyali')
+        self.assertEqual(estate.sub_county.county.code, '001')
+        self.assertEqual(str(estate.center_longitude), '39.710000')
+
+
+class AdminStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser('boss', 'boss@example.com', 'pass12345')
+        make_property(self.admin, name='Approved', verification_status='approved', ai_verification_result='MATCH')
+        make_property(self.admin, name='Pending', price=Decimal('35000'))
+
+    def test_one_query_per_table_then_cached(self):
+        with self.assertNumQueries(4):
+            stats = admin_stats()
+        self.assertEqual(
+            (stats['total_properties'], stats['verified_properties'], stats['pending_properties']),
+            (2, 1, 1),
+        )
+        self.assertEqual(stats['avg_price'], Decimal('30000'))
+        self.assertEqual(stats['total_users'], 1)
+        self.assertEqual(len(stats['properties_by_status']), 2)
+        with self.assertNumQueries(0):
+            admin_stats()
+
+    def test_custom_admin_renders(self):
+        self.client.force_login(self.admin)
+        response = self.client.get(reverse('custom_admin'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_properties'], 2)
+
+
+class DashboardSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('landlord', password='pass12345')
+        self.prop = make_property(self.user, name='Mine', verification_status='approved', ai_verification_result='MATCH')
+        self.client.force_login(self.user)
+        self.url = reverse('dashboard')
+
+    def test_summary_is_cached_until_the_users_rows_change(self):
+        response = self.client.get(self.url)
+        self.assertEqual((response.context['total_properties'], response.context['verified_properties']), (1, 1))
+        self.assertIsNone(response.context['wallet_balance'])
+        
+        with CaptureQueriesContext(connection) as warm:
+            self.client.get(self.url)
+        self.assertFalse([q for q in warm.captured_queries if 'properties_property' in q['sql']])
+        
+        make_property(self.user, name='Second')
+        Booking.objects.create(
+            property=self.prop, user=self.user, name='T', email='t@example.com', phone='0700',
+            date=timezone.now().date(), time_slot='10:00',
+        )
+        response = self.client.get(self.url)
+        self.assertEqual((response.context['total_properties'], response.context['pending_properties']), (2, 1))
+        self.assertEqual(response.context['total_bookings'], 1)
+        self.assertContains(response, 'Mine')
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=os.path.join(self.tmp.name, 'media'),
+            CHUNKED_UPLOAD_DIR=os.path.join(self.tmp.name, 'partial'),
+        )
+        self.settings_override.enable()
+        self.data = os.urandom(300 * 1024)
+        self.user = User.objects.create_user('tenant', password='pass12345')
+        self.client.force_login(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def put(self, upload_id, offset, chunk):
+        return self.client.put(
+            reverse('api_upload_chunk', args=[upload_id]), chunk,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_resumable_chunked_upload(self):
+        response = self.client.post(
+            reverse('api_upload_start'), json.dumps({'filename': 'tour.mp4', 'size': len(self.data)}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['upload_id']
+        
+        self.assertEqual(self.put(upload_id, 0, self.data[:100000]).json()['offset'], 100000)
+        # A retry of an old chunk is told where to resume
+        response = self.put(upload_id, 0, self.data[:100000])
+        self.assertEqual((response.status_code, response.json()['offset']), (409, 100000))
+        # Finalizing early is refused
+        self.assertEqual(self.client.post(reverse('api_upload_finalize', args=[upload_id])).status_code, 409)
+        
+        offset = self.client.get(reverse('api_upload_chunk', args=[upload_id])).json()['offset']
+        self.assertEqual(self.put(upload_id, offset, self.data[offset:]).json()['offset'], len(self.data))
+        
+        response = self.client.post(reverse('api_upload_finalize', args=[upload_id]))
+        self.assertTrue(response.json()['success'])
+        upload = ChunkedUpload.objects.get(pk=upload_id)
+        self.assertEqual(upload.status, 'complete')
+        with default_storage.open(upload.file_path) as handle:
+            self.assertEqual(handle.read(), self.data)
+        self.assertEqual(os.listdir(os.path.join(self.tmp.name, 'partial')), [])
+
+    def test_rejects_bad_type_and_oversized_chunks(self):
+        response = self.client.post(
+            reverse('api_upload_start'), json.dumps({'filename': 'run.exe', 'size': 10}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 400)
+        upload = ChunkedUpload.objects.create(user=self.user, filename='a.jpg', size=10)
+        self.assertEqual(self.put(upload.pk, 0, b'x' * 11).status_code, 400)
+
+    def test_late_finalize_and_chunk_see_the_completed_upload(self):
+        upload = ChunkedUpload.objects.create(user=self.user, filename='a.jpg', size=len(self.data))
+        stale, stale_writer = ChunkedUpload.objects.get(pk=upload.pk), ChunkedUpload.objects.get(pk=upload.pk)
+        before = upload.updated_at
+        self.assertEqual(self.put(upload.pk, 0, self.data).status_code, 200)
+        upload.refresh_from_db()
+        self.assertGreater(upload.updated_at, before)
+        
+        first = self.client.post(reverse('api_upload_finalize', args=[upload.pk])).json()['file_url']
+        # A request that loaded the row before the first finalize committed
+        stale.received = stale.size
+        self.assertEqual(default_storage.url(finalize_upload(stale)), first)
+        with self.assertRaises(OffsetMismatch):
+            write_chunk(stale_writer, 0, BytesIO(b'x'), 1)
+
+    def test_uploads_belong_to_an_authenticated_user(self):
+        mine = ChunkedUpload.objects.create(user=self.user, filename='a.jpg', size=10)
+        orphan = ChunkedUpload.objects.create(filename='b.jpg', size=10)
+        self.assertEqual(self.put(orphan.pk, 0, b'x' * 10).status_code, 404)
+        
+        self.client.force_login(User.objects.create_user('other', password='pass12345'))
+        self.assertEqual(self.put(mine.pk, 0, b'x' * 10).status_code, 404)
+        self.assertEqual(self.client.post(reverse('api_upload_finalize', args=[mine.pk])).status_code, 404)
+        
+        self.client.logout()
+        response = self.client.post(
+            reverse('api_upload_start'), json.dumps({'filename': 'tour.mp4', 'size': 10}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 401)
+
+
+class MediaBlobTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.tmp.name)
+        self.settings_override.enable()
+        self.owner = User.objects.create_user('landlord', password='pass12345')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def upload(self, name, data):
+        return self.client.post(reverse('api_upload'), {'file': SimpleUploadedFile(name, data)}).json()
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload('front.jpg', b'same bytes')
+        second = self.upload('copy.jpg', b'same bytes')
+        self.assertEqual(first['url'], second['url'])
+        self.assertEqual((first['deduplicated'], second['deduplicated']), (False, True))
+        self.assertEqual(MediaBlob.objects.count(), 1)
+
+    def test_references_are_counted_and_unreferenced_blobs_collected(self):
+        kept = MediaBlob.objects.get(sha256=self.upload('a.jpg', b'kept')['sha256'])
+        orphan = MediaBlob.objects.get(sha256=self.upload('b.jpg', b'orphan')['sha256'])
+        image = PropertyImage.objects.create(property=make_property(self.owner), image=kept.file)
+        kept.refresh_from_db()
+        self.assertEqual(kept.ref_count, 1)
+        
+        # Counts drift under bulk writes; the collector recounts before deleting
+        MediaBlob.objects.update(ref_count=0, last_uploaded_at=timezone.now() - timedelta(days=2))
+        call_command('gc_media_blobs', stdout=StringIO())
+        self.assertEqual(list(MediaBlob.objects.values_list('sha256', 'ref_count')), [(kept.sha256, 1)])
+        self.assertFalse(default_storage.exists(orphan.file))
+        self.assertTrue(default_storage.exists(kept.file))
+        
+        image.delete()
+        kept.refresh_from_db()
+        self.assertEqual(kept.ref_count, 0)
+
+    def test_delete_rechecks_references_before_removing(self):
+        blob = MediaBlob.objects.get(sha256=self.upload('a.jpg', b'in use')['sha256'])
+        PropertyImage.objects.create(property=make_property(self.owner), image=blob.file)
+        # A count overwritten by a stale recount must not delete a file in use
+        MediaBlob.objects.update(ref_count=0)
+        self.assertFalse(delete_blob(blob))
+        self.assertTrue(MediaBlob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(default_storage.exists(blob.file))
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.tmp.name)
+        self.settings_override.enable()
+        self.prop = make_property(User.objects.create_user('landlord', password='pass12345'))
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def save_photo(self, name, width, height, orientation=1):
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = orientation
+        buffer = BytesIO()
+        Image.new('RGB', (width, height), (200, 120, 40)).save(buffer, 'JPEG', exif=exif)
+        return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    def render(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            image = PropertyImage.objects.create(property=self.prop, image=name)
+        image.refresh_from_db()
+        return image.variants
+
+    def test_upload_renders_variants_into_listing_srcset(self):
+        name = self.save_photo('properties/images/front.jpg', 1000, 600)
+        with self.captureOnCommitCallbacks(execute=True):
+            image = PropertyImage.objects.create(property=self.prop, image=name)
+        image.refresh_from_db()
+        self.assertEqual(image.variants['jpeg']['400'], 'properties/images/front_400w.jpg')
+        self.assertEqual(sorted(image.variants['webp']), ['200', '400', '800'])
+        with default_storage.open(image.variants['webp']['200']) as handle:
+            self.assertEqual(Image.open(handle).size, (200, 120))
+        
+        listing = self.client.get(reverse('api_properties')).json()['properties'][0]
+        self.assertEqual(listing['thumbnail'], '/media/properties/images/front_400w.jpg')
+        self.assertEqual(listing['srcset']['webp'], ', '.join(
+            f'/media/properties/images/front_{width}w.webp {width}w' for width in (200, 400, 800)
+        ))
+
+    def test_drafted_originals_still_get_the_largest_width(self):
+        # 1600px decodes at exactly half scale, i.e. 800px wide
+        variants = self.render(self.save_photo('wide.jpg', 1600, 1200))
+        self.assertEqual(sorted(variants['jpeg'], key=int), ['200', '400', '800'])
+        with default_storage.open(variants['jpeg']['800']) as handle:
+            self.assertEqual(Image.open(handle).size, (800, 600))
+
+    def test_rotated_phone_photos_are_sized_by_their_displayed_width(self):
+        # Stored landscape, displayed portrait (EXIF orientation 6)
+        variants = self.render(self.save_photo('portrait.jpg', 4032, 3024, orientation=6))
+        self.assertEqual(sorted(variants['webp'], key=int), ['200', '400', '800'])
+        with default_storage.open(variants['webp']['800']) as handle:
+            self.assertEqual(Image.open(handle).size, (800, 1067))
+
+    def test_backfill_skips_upscaling_and_rendered_images(self):
+        small = PropertyImage.objects.create(property=self.prop, image=self.save_photo('small.jpg', 300, 200))
+        self.assertEqual(small.variants, {})
+        
+        out = StringIO()
+        call_command('generate_thumbnails', workers=2, stdout=out)
+        small.refresh_from_db()
+        self.assertEqual(small.variants['jpeg'], {'200': 'small_200w.jpg'})
+        self.assertIn('Rendered variants for 1 images', out.getvalue())
+        
+        call_command('generate_thumbnails', workers=2, stdout=out)
+        self.assertIn('Rendered variants for 0 images', out.getvalue())
+
+
+def geotagged_jpeg(latitude, longitude, taken='2026:10:01 09:30:00'):
+    def dms(value):
+        value = abs(value)
+        minutes = (value % 1) * 60
+        return (float(int(value)), float(int(minutes)), round((minutes % 1) * 60, 4))
+    
+    exif = Image.Exif()
+    exif[ExifTags.IFD.GPSInfo] = {
+        ExifTags.GPS.GPSLatitudeRef: 'S' if latitude < 0 else 'N',
+        ExifTags.GPS.GPSLatitude: dms(latitude),
+        ExifTags.GPS.GPSLongitudeRef: 'W' if longitude < 0 else 'E',
+        ExifTags.GPS.GPSLongitude: dms(longitude),
+    }
+    exif.get_ifd(ExifTags.IFD.Exif)[ExifTags.Base.DateTimeOriginal] = taken
+    buffer = BytesIO()
+    Image.new('RGB', (64, 48), (90, 140, 60)).save(buffer, 'JPEG', exif=exif)
+    return buffer.getvalue()
+
+
+@override_settings(THUMBNAIL_WORKERS=0)
+class PhotoLocationTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(MEDIA_ROOT=self.tmp.name)
+        self.settings_override.enable()
+        self.landlord = User.objects.create_user('landlord', password='pass12345')
+        LandlordApplication.objects.create(
+            user=self.landlord, full_name='Land Lord', email='ll@example.com', phone='0700000000',
+            id_document='landlords/ids/id.pdf', status='approved',
+        )
+        self.client.force_login(self.landlord)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.tmp.cleanup()
+
+    def upload(self, data):
+        return self.client.post(reverse('api_upload'), {'file': SimpleUploadedFile('photo.jpg', data)}).json()
+
+    def submit(self, name, images, latitude=-1.2915, longitude=36.7855):
+        response = self.client.post(reverse('api_submit_property'), json.dumps({
+            'name': name, 'price': 30000, 'latitude': latitude, 'longitude': longitude, 'images': images,
+        }), content_type='application/json')
+        return response.json()['property']
+
+    def test_upload_returns_gps_and_submit_scores_photos_against_pin(self):
+        uploaded = self.upload(geotagged_jpeg(-1.2916, 36.7856))
+        self.assertAlmostEqual(uploaded['gps']['latitude'], -1.2916, places=5)
+        self.assertAlmostEqual(uploaded['gps']['longitude'], 36.7856, places=5)
+        
+        result = self.submit('On site', [uploaded['url'], '/media/properties/images/not-a-blob.jpg'])
+        self.assertEqual((result['ai_verification_result'], result['verification_status']), ('MATCH', 'approved'))
+        image = PropertyImage.objects.get(property_id=result['id'])
+        self.assertTrue(image.is_primary)
+        self.assertEqual(image.location_score, 100)
+        self.assertEqual(timezone.localtime(image.taken_at).hour, 9)
+        self.assertEqual(Property.objects.get(pk=result['id']).cover_image_id, image.id)
+        listings = self.client.get(reverse('api_properties')).json()['properties']
+        self.assertEqual([p['image'] for p in listings if p['id'] == result['id']], [uploaded['url']])
+        
+        # Photos taken across town do not verify a pin
+        result = self.submit('Elsewhere', [uploaded['url']], latitude=-1.2200, longitude=36.9000)
+        self.assertEqual((result['ai_verification_result'], result['verification_score']), ('FAILED', 0))
+        
+        # Without geotagged photos the listing waits for manual review
+        plain = self.upload(b'not really a jpeg')
+        self.assertIsNone(plain['gps'])
+        result = self.submit('No GPS', [plain['url']])
+        self.assertEqual((result['ai_verification_result'], result['verification_status']), ('PENDING', 'pending'))
+
+    def test_backfill_reads_existing_photos(self):
+        prop = make_property(self.landlord, latitude=Decimal('-1.2915'), longitude=Decimal('36.7855'))
+        near = default_storage.save('properties/images/near.jpg', ContentFile(geotagged_jpeg(-1.2930, 36.7855)))
+        PropertyImage.objects.create(property=prop, image=near)
+        PropertyImage.objects.create(property=prop, image='properties/images/missing.jpg')
+        
+        out = StringIO()
+        call_command('verify_photo_locations', update_pending=True, workers=4, stdout=out)
+        self.assertIn('Checked 2 photos, 1 geotagged; updated 1 pending properties', out.getvalue())
+        self.assertEqual(
+            list(PropertyImage.objects.order_by('pk').values_list('exif_checked', 'location_score')),
+            [(True, 100), (True, None)],
+        )
+        prop.refresh_from_db()
+        self.assertEqual((prop.ai_verification_result, prop.verification_status), ('MATCH', 'approved'))
+        self.assertEqual(PropertySearchDoc.objects.get(property=prop).verification_status, 'approved')
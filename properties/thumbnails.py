@@ -0,0 +1,190 @@
+"""
+Responsive image variants for PropertyImage
+
+Every image gets 200/400/800px wide WebP and JPEG copies, stored beside the
+original as <name>_<width>w.<ext> and recorded in PropertyImage.variants; the
+cover image's URLs are copied into the search doc so listing cards can pick a
+size through srcset. Originals narrower than a width are never upscaled.
+
+Resizing is CPU-bound, so it runs in a ProcessPoolExecutor. The worker
+function, render_variants(), only sees bytes: the parent reads the original
+from storage and saves what comes back, so workers never touch the database
+and any storage backend works.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+
+try:
+    from PIL import ExifTags, Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+THUMBNAIL_WIDTHS = (200, 400, 800)
+CARD_WIDTH = 400  # Listing card image when the client ignores srcset
+# Variant format -> (Pillow format, file extension, save options)
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', '.webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', '.jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+_executor = None
+
+
+def variant_name(name, width, fmt):
+    stem = os.path.splitext(name)[0]
+    return f'{stem}_{width}w{THUMBNAIL_FORMATS[fmt][1]}'
+
+
+def render_variants(data, widths=THUMBNAIL_WIDTHS):
+    """
+    Worker: encode the variants of one image from its bytes.
+    Returns {fmt: {width: bytes}}, empty if the bytes are not a usable image.
+    """
+    try:
+        with Image.open(BytesIO(data)) as original:
+            max_width = max(widths)
+            # Orientations 5-8 are stored rotated a quarter turn: the displayed
+            # width is the stored height
+            rotated = original.getexif().get(ExifTags.Base.Orientation) in (5, 6, 7, 8)
+            display_width, display_height = original.size[::-1] if rotated else original.size
+            if display_width > max_width:
+                # JPEG decodes at a reduced scale, far cheaper than full size;
+                # draft() never goes below the requested size
+                target = (max_width, max_width * display_height // display_width)
+                original.draft('RGB', target[::-1] if rotated else target)
+            image = ImageOps.exif_transpose(original)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
+
+            rendered = {fmt: {} for fmt in THUMBNAIL_FORMATS}
+            # Largest first, each step resizing the previous one
+            for width in sorted(widths, reverse=True):
+                if width > image.width:
+                    continue
+                if width < image.width:
+                    height = max(1, round(image.height * width / image.width))
+                    image = image.resize((width, height), Image.LANCZOS, reducing_gap=3.0)
+                for fmt, (pil_format, _, options) in THUMBNAIL_FORMATS.items():
+                    buffer = BytesIO()
+                    image.save(buffer, pil_format, **options)
+                    rendered[fmt][width] = buffer.getvalue()
+            return rendered
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return {}
+
+
+def read_original(name):
+    with default_storage.open(name) as handle:
+        return handle.read()
+
+
+def save_variants(name, rendered):
+    """Store rendered variants beside the original; returns the variants record"""
+    variants = {'source': name}
+    for fmt, sizes in rendered.items():
+        variants[fmt] = {}
+        for width, data in sorted(sizes.items()):
+            target = variant_name(name, width, fmt)
+            # Names derive from the original, so an existing file is this same
+            # variant (e.g. a deduplicated blob rendered for another listing)
+            if not default_storage.exists(target):
+                target = default_storage.save(target, ContentFile(data))
+            variants[fmt][str(width)] = target
+    return variants
+
+
+def store_variants(image_id, name, rendered):
+    """Save and record variants, unless the image was replaced meanwhile"""
+    from .models import PropertyImage
+
+    variants = save_variants(name, rendered)
+    # update() so recording variants does not re-fire the PropertyImage signals
+    return PropertyImage.objects.filter(pk=image_id, image=name).update(variants=variants) > 0
+
+
+def needs_variants(image):
+    """True if image's stored variants were not rendered from its current file"""
+    if not image.image:
+        return False
+    return image.variants.get('source') != image.image.name
+
+
+def generate_variants(image):
+    """Render and record image's variants in this process"""
+    from .search import sync_search_docs
+
+    name = image.image.name
+    try:
+        data = read_original(name)
+    except OSError:
+        return
+    if store_variants(image.pk, name, render_variants(data)):
+        sync_search_docs([image.property_id])
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS)
+    return _executor
+
+
+def _variants_rendered(image_id, property_id, name, future):
+    # Runs on the executor's result thread, which has its own connection
+    from .search import sync_search_docs
+
+    try:
+        if store_variants(image_id, name, future.result()):
+            sync_search_docs([property_id])
+    finally:
+        connection.close()
+
+
+def _submit(image_id, property_id, name):
+    try:
+        data = read_original(name)
+    except OSError:
+        return
+    future = get_executor().submit(render_variants, data)
+    future.add_done_callback(lambda future: _variants_rendered(image_id, property_id, name, future))
+
+
+def queue_variants(image):
+    """Render image's variants in the worker pool once the current transaction commits"""
+    if not PIL_AVAILABLE or not needs_variants(image):
+        return
+    if not settings.THUMBNAIL_WORKERS:
+        transaction.on_commit(lambda: generate_variants(image))
+        return
+    image_id, property_id, name = image.pk, image.property_id, image.image.name
+    transaction.on_commit(lambda: _submit(image_id, property_id, name))
+
+
+def variant_urls(variants):
+    """Search doc form of a variants record: {fmt: [[width, url], ...]} by ascending width"""
+    urls = {}
+    for fmt in THUMBNAIL_FORMATS:
+        sizes = sorted((int(width), name) for width, name in variants.get(fmt, {}).items())
+        if sizes:
+            urls[fmt] = [[width, default_storage.url(name)] for width, name in sizes]
+    return urls
+
+
+def srcset(urls):
+    """{fmt: 'url 200w, url 400w'} from variant_urls() output"""
+    return {fmt: ', '.join(f'{url} {width}w' for width, url in sizes) for fmt, sizes in urls.items()}
+
+
+def card_url(urls):
+    """The JPEG closest to CARD_WIDTH without going under it, or None"""
+    sizes = urls.get('jpeg')
+    if not sizes:
+        return None
+    return next((url for width, url in sizes if width >= CARD_WIDTH), sizes[-1][1])
@@ -0,0 +1,146 @@
+"""
+Chunked, resumable media uploads
+
+A client starts an upload with its filename and size, then sends the bytes
+in chunks, each tagged with the offset it starts at. Chunks are streamed from
+the request straight into a partial file with os.pwrite, and
+ChunkedUpload.received records how far the file is complete, so after a
+dropped connection the client asks for the offset and carries on from there.
+Finalizing stores the partial file as a content-addressed media blob;
+FileSystemStorage moves it into place rather than copying it through memory.
+"""
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .media import store_blob
+from .models import ChunkedUpload
+
+ALLOWED_UPLOAD_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.pdf', '.mp4', '.mov']
+MAX_UPLOAD_SIZE = 20 * 1024 * 1024  # Single-request api_upload
+MAX_CHUNKED_UPLOAD_SIZE = 1024 * 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class OffsetMismatch(ValueError):
+    """The chunk does not start where the upload left off"""
+    def __init__(self, expected):
+        super().__init__(f'Chunk must start at offset {expected}')
+        self.expected = expected
+
+
+def upload_extension(filename):
+    """Lower-cased extension, or ValueError when the type is not accepted"""
+    ext = os.path.splitext(filename or '')[1].lower()
+    if ext not in ALLOWED_UPLOAD_EXTENSIONS:
+        raise ValueError('Invalid file type')
+    return ext
+
+
+def partial_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f'{upload.pk}.part')
+
+
+def start_upload(user, filename, size):
+    upload_extension(filename)
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise ValueError('size must be the file size in bytes')
+    if size <= 0:
+        raise ValueError('size must be the file size in bytes')
+    if size > MAX_CHUNKED_UPLOAD_SIZE:
+        raise ValueError('File too large')
+    return ChunkedUpload.objects.create(
+        user=user,
+        filename=os.path.basename(filename)[:255],
+        size=size,
+    )
+
+
+def write_chunk(upload, offset, stream, length):
+    """
+    Stream `length` bytes from `stream` into the partial file at `offset`.
+    Returns the new received count; raises OffsetMismatch if the chunk does
+    not continue the upload and ValueError for bad lengths.
+    """
+    if upload.status != 'uploading':
+        raise ValueError('Upload already finalized')
+    if offset != upload.received:
+        raise OffsetMismatch(upload.received)
+    if length <= 0 or length > MAX_CHUNK_SIZE or offset + length > upload.size:
+        raise ValueError(f'Chunk length must be between 1 and {MAX_CHUNK_SIZE} bytes and within the file size')
+    
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    fd = os.open(partial_path(upload), os.O_WRONLY | os.O_CREAT, 0o600)
+    written = 0
+    try:
+        while written < length:
+            block = stream.read(min(READ_BLOCK_SIZE, length - written))
+            if not block:
+                break
+            os.pwrite(fd, block, offset + written)
+            written += len(block)
+    finally:
+        os.close(fd)
+    
+    # Only the writer that started from the recorded offset may advance it.
+    # update() skips auto_now, and updated_at is what marks an upload abandoned
+    advanced = ChunkedUpload.objects.filter(pk=upload.pk, status='uploading', received=offset).update(
+        received=offset + written, updated_at=timezone.now(),
+    )
+    if not advanced:
+        upload.refresh_from_db(fields=['received'])
+        raise OffsetMismatch(upload.received)
+    upload.received = offset + written
+    return upload.received
+
+
+class _PartialFile(File):
+    # FileSystemStorage moves files that expose a temporary path instead of copying them
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def finalize_upload(upload):
+    """Store the complete partial file as a media blob; returns the storage path"""
+    with transaction.atomic():
+        # Concurrent finalizes queue on the row lock; the later ones find it complete
+        current = ChunkedUpload.objects.select_for_update().get(pk=upload.pk)
+        upload.status, upload.received, upload.file_path = current.status, current.received, current.file_path
+        if upload.status == 'complete':
+            return upload.file_path
+        if upload.received != upload.size:
+            raise OffsetMismatch(upload.received)
+        
+        path = partial_path(upload)
+        try:
+            handle = open(path, 'rb')
+        except FileNotFoundError:
+            # Backends without row locks (SQLite): another finalize moved it first
+            upload.refresh_from_db(fields=['status', 'file_path'])
+            if upload.status == 'complete':
+                return upload.file_path
+            raise
+        with handle:
+            blob, created = store_blob(_PartialFile(handle, name=upload.filename), upload_extension(upload.filename))
+        if os.path.exists(path):
+            # Duplicates and non-filesystem storages leave the partial file behind
+            os.remove(path)
+        
+        upload.status = 'complete'
+        upload.file_path = blob.file
+        upload.save(update_fields=['status', 'file_path', 'updated_at'])
+        return blob.file
+
+
+def discard_upload(upload):
+    """Delete an abandoned upload and its partial file"""
+    path = partial_path(upload)
+    if os.path.exists(path):
+        os.remove(path)
+    upload.delete()
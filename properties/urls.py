@@ -18,9 +18,19 @@ urlpatterns = [
 
     # APIs
     path('api/properties/', views.api_properties, name='api_properties'),
+    path('api/properties/clusters/', views.api_property_clusters, name='api_property_clusters'),
+    path('api/properties/changes/', views.api_property_changes, name='api_property_changes'),
+    path('api/properties/export/', views.api_properties_export, name='api_properties_export'),
+    path('api/properties/cache-stats/', views.api_listings_cache_stats, name='api_listings_cache_stats'),
+    path('api/properties/<int:property_id>/', views.api_property_detail, name='api_property_detail'),
     path('api/booking/', views.api_booking, name='api_booking'),
     path('api/locations/', views.api_locations, name='api_locations'),
+    path('api/locations/popular/', views.api_popular_locations, name='api_popular_locations'),
+    path('api/locations/suggest/', views.api_location_suggest, name='api_location_suggest'),
     path('api/upload/', views.api_upload, name='api_upload'),
+    path('api/uploads/', views.api_upload_start, name='api_upload_start'),
+    path('api/uploads/<uuid:upload_id>/', views.api_upload_chunk, name='api_upload_chunk'),
+    path('api/uploads/<uuid:upload_id>/finalize/', views.api_upload_finalize, name='api_upload_finalize'),
     path('api/submit-property/', views.api_submit_property, name='api_submit_property'),
 ]
 
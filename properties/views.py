@@ -1,31 +1,48 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, HttpResponseNotModified, StreamingHttpResponse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 from django.core.files.storage import default_storage
 from django.conf import settings
-from django.contrib.auth.models import User
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Q, Count, Avg
 from django.utils import timezone
-from datetime import timedelta
-from .models import Property, PropertyImage, PropertyVideo, PropertyAmenity, Booking, LandlordApplication
+from django.utils.cache import patch_vary_headers
+from .models import Property, PropertyImage, PropertyVideo, PropertyAmenity, PropertySearchDoc, Booking, LandlordApplication, ChunkedUpload
 import urllib.parse
 from .forms import SignUpForm, LandlordApplicationForm
+from .admin_stats import admin_stats
+from .caching import (
+    PROPERTY_MISSING, cache_stats, cached_listing_response, cached_property_version, is_not_modified,
+    listings_version, locations_version, set_conditional_headers,
+)
+from .changes import DEFAULT_BATCH_SIZE, MAX_BATCH_SIZE, changes_since, parse_since
+from .clusters import clusters_for_bbox
+from .compression import MIN_COMPRESS_SIZE, accepted_encodings, compressed_response, preferred_encoding
+from .dashboard import dashboard_summary
+from .detail import get_property_detail
+from .export import EXPORT_FORMATS, export_queryset, iter_export
+from .facets import facet_counts
+from .filters import ATTRIBUTE_FILTER_PARAMS, filter_key, filter_properties
+from .geo import parse_bbox
+from .geocode import reverse_geocode
+from .location_tree import TREE_MAX_AGE, get_location_tree, tree_etag
+from .media import blob_names, store_blob
+from .pagination import InvalidCursor, paginate_keyset, parse_page_size
+from .photo_location import HEADER_BYTES, VERIFICATION_STATUSES, parse_exif, verify_photo_locations
+from .search import (
+    LISTING_FIELDS, listing_columns, parse_listing_fields, query_terms,
+    search_doc_to_dict, search_doc_to_row,
+)
+from .suggest import MAX_SUGGEST_LIMIT, SUGGEST_LIMIT, suggest_locations
+from .uploads import (
+    ALLOWED_UPLOAD_EXTENSIONS, MAX_CHUNK_SIZE, MAX_UPLOAD_SIZE, OffsetMismatch,
+    finalize_upload, start_upload, write_chunk,
+)
 from decimal import Decimal, InvalidOperation
 import json
 import os
-import uuid
-
-# GPS extraction from EXIF
-try:
-    from PIL import Image
-    from PIL.ExifTags import TAGS, GPSTAGS
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
 
 def home(request):
     """Home page view"""
@@ -137,15 +154,8 @@ def dashboard(request):
     """User dashboard showing properties, bookings, and stats"""
     user = request.user
     
-    # Get user's properties (if landlord)
-    user_properties = Property.objects.filter(owner=user).order_by('-created_at')[:10]
-    total_properties = Property.objects.filter(owner=user).count()
-    verified_properties = Property.objects.filter(owner=user, verification_status='approved', ai_verification_result='MATCH').count()
-    pending_properties = Property.objects.filter(owner=user, verification_status='pending').count()
-    
-    # Get user's bookings (if tenant)
-    user_bookings = Booking.objects.filter(user=user).order_by('-created_at')[:10]
-    total_bookings = Booking.objects.filter(user=user).count()
+    # Counters, recent properties and bookings, wallet: cached per user
+    summary = dashboard_summary(user)
     
     # Check if user is a landlord
     is_landlord = False
@@ -156,26 +166,11 @@ def dashboard(request):
     except LandlordApplication.DoesNotExist:
         pass
     
-    # Get wallet balance if available
-    wallet_balance = None
-    try:
-        from wallet.models import Wallet
-        wallet = Wallet.objects.get(user=user)
-        wallet_balance = wallet.balance
-    except:
-        pass
-    
     context = {
         'user': user,
         'is_landlord': is_landlord,
         'landlord_application': landlord_application,
-        'user_properties': user_properties,
-        'total_properties': total_properties,
-        'verified_properties': verified_properties,
-        'pending_properties': pending_properties,
-        'user_bookings': user_bookings,
-        'total_bookings': total_bookings,
-        'wallet_balance': wallet_balance,
+        **summary,
     }
     
     return render(request, 'properties/dashboard.html', context)
@@ -188,32 +183,8 @@ def is_admin(user):
 @user_passes_test(is_admin)
 def custom_admin(request):
     """Custom admin dashboard with modern UI"""
-    # Statistics
-    total_properties = Property.objects.count()
-    verified_properties = Property.objects.filter(verification_status='approved', ai_verification_result='MATCH').count()
-    pending_properties = Property.objects.filter(verification_status='pending').count()
-    rejected_properties = Property.objects.filter(verification_status='rejected').count()
-    
-    total_users = User.objects.count()
-    total_bookings = Booking.objects.count()
-    pending_bookings = Booking.objects.filter(status='pending').count()
-    
-    total_landlords = LandlordApplication.objects.filter(status='approved').count()
-    pending_landlord_apps = LandlordApplication.objects.filter(status='pending').count()
-    
-    # Recent activity (last 7 days)
-    week_ago = timezone.now() - timedelta(days=7)
-    recent_properties = Property.objects.filter(created_at__gte=week_ago).count()
-    recent_users = User.objects.filter(date_joined__gte=week_ago).count()
-    recent_bookings = Booking.objects.filter(created_at__gte=week_ago).count()
-    
-    # Average property price
-    avg_price = Property.objects.aggregate(avg_price=Avg('price'))['avg_price'] or 0
-    
-    # Properties by status
-    properties_by_status = Property.objects.values('verification_status').annotate(
-        count=Count('id')
-    ).order_by('-count')
+    # Statistics: one aggregate query per table, cached briefly
+    stats = admin_stats()
     
     # Recent properties
     latest_properties = Property.objects.select_related('owner').order_by('-created_at')[:10]
@@ -232,25 +203,9 @@ def custom_admin(request):
     ).select_related('owner').order_by('-created_at')[:10]
     
     context = {
-        # Statistics
-        'total_properties': total_properties,
-        'verified_properties': verified_properties,
-        'pending_properties': pending_properties,
-        'rejected_properties': rejected_properties,
-        'total_users': total_users,
-        'total_bookings': total_bookings,
-        'pending_bookings': pending_bookings,
-        'total_landlords': total_landlords,
-        'pending_landlord_apps': pending_landlord_apps,
-        
-        # Recent activity
-        'recent_properties': recent_properties,
-        'recent_users': recent_users,
-        'recent_bookings': recent_bookings,
-        'avg_price': avg_price,
+        **stats,
         
         # Data lists
-        'properties_by_status': properties_by_status,
         'latest_properties': latest_properties,
         'latest_bookings': latest_bookings,
         'pending_applications': pending_applications,
@@ -260,181 +215,72 @@ def custom_admin(request):
     return render(request, 'admin/custom_admin.html', context)
 
 @require_http_methods(["GET"])
+@compressed_response
+@cached_listing_response
 def api_properties(request):
-    """API endpoint for properties"""
+    """API endpoint for properties, served from the flat PropertySearchDoc table"""
     try:
-        # Get properties from database
-        try:
-            queryset = Property.objects.filter(available=True).select_related('owner').prefetch_related('images', 'amenities')
-            
-            # Try to select_related estate if it exists
-            try:
-                queryset = queryset.select_related('estate', 'estate__sub_county', 'estate__sub_county__county')
-            except Exception:
-                # If estate relationship doesn't exist, continue without it
-                pass
-        except Exception as e:
-            # If Property model query fails, return empty queryset
-            queryset = Property.objects.none()
+        queryset = PropertySearchDoc.objects.all()
         
         # Apply filters if provided
-        county = request.GET.get('county', '')
-        estate = request.GET.get('estate', '')
-        min_price = request.GET.get('minPrice', '')
-        max_price = request.GET.get('maxPrice', '')
-        bedrooms = request.GET.get('bedrooms', '')
-        property_type = request.GET.getlist('propertyType')
-        verified = request.GET.get('verified', '')
+        near = request.GET.get('near', '')
+        order = 'newest'
+        try:
+            queryset = filter_properties(queryset, request.GET)
+        except ValueError as e:
+            return JsonResponse({'error': f'Invalid location filter: {e}'}, status=400)
+        sort = request.GET.get('sort', '')
+        if near and sort == 'distance':
+            order = 'distance'
+        elif query_terms(request.GET.get('q')) and sort != 'newest':
+            # Full-text matches are ranked by relevance unless asked otherwise
+            order = 'relevance'
         
-        if county:
-            # Filter by county - check both new location system and legacy field
-            queryset = queryset.filter(
-                Q(estate__sub_county__county__name__icontains=county) |
-                Q(county__icontains=county)
-            )
-        if estate:
-            # Filter by estate - check both new location system and legacy field
-            queryset = queryset.filter(
-                Q(estate__name__icontains=estate) |
-                Q(estate_name__icontains=estate)
-            )
-        if min_price:
-            try:
-                queryset = queryset.filter(price__gte=Decimal(min_price))
-            except (ValueError, InvalidOperation):
-                pass
-        if max_price:
-            try:
-                queryset = queryset.filter(price__lte=Decimal(max_price))
-            except (ValueError, InvalidOperation):
-                pass
-        if bedrooms:
-            try:
-                bed_filter = int(bedrooms)
-                if bed_filter == 4:
-                    queryset = queryset.filter(bedrooms__gte=4)
-                else:
-                    queryset = queryset.filter(bedrooms=bed_filter)
-            except ValueError:
-                pass
-        if property_type:
-            queryset = queryset.filter(property_type__in=property_type)
-        if verified == 'true':
-            queryset = queryset.filter(verification_status='approved', ai_verification_result='MATCH')
+        # Sparse fieldsets (fields=id,price,latitude,longitude) load only the needed columns
+        try:
+            fields = parse_listing_fields(request.GET.get('fields', ''))
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        columnar = request.GET.get('format') == 'columns'
+        page_queryset = queryset.only(*listing_columns(fields)) if fields else queryset
+        
+        # Keyset pagination on (created_at, id) - no OFFSET, no COUNT(*)
+        cursor = request.GET.get('cursor', '')
+        page_size = parse_page_size(request.GET.get('page_size'))
         
         # Convert to JSON format
         properties = []
+        next_cursor = None
         # Evaluate queryset safely
         try:
-            property_list = list(queryset[:100])  # Limit to 100 properties
+            docs, next_cursor = paginate_keyset(page_queryset, cursor=cursor, page_size=page_size, order=order)
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
         except Exception as e:
             # If queryset fails, return empty and let fallback handle it
-            property_list = []
+            docs = []
         
-        for prop in property_list:
-            # Get primary image or first image
-            primary_image = prop.images.filter(is_primary=True).first()
-            if not primary_image:
-                primary_image = prop.images.first()
-            
-            # Get image URL - handle both relative and absolute URLs
-            if primary_image:
-                try:
-                    image_url = primary_image.image.url
-                    # Ensure it's a full URL if it's relative
-                    if image_url.startswith('/media/'):
-                        # It's already a proper URL path
-                        pass
-                    elif not image_url.startswith('http'):
-                        # Make it a proper media URL
-                        image_url = f'/media/{primary_image.image.name}'
-                except:
-                    image_url = 'https://images.unsplash.com/photo-1545324418-cc1a3fa10c00?w=400&h=300&fit=crop'
-            else:
-                image_url = 'https://images.unsplash.com/photo-1545324418-cc1a3fa10c00?w=400&h=300&fit=crop'
-            
-            # Format location string properly - handle both new location system and legacy
-            try:
-                if prop.estate and hasattr(prop.estate, 'full_location_string'):
-                    # Use new location system
-                    location_string = prop.estate.full_location_string
-                elif prop.estate:
-                    # Estate exists but doesn't have full_location_string, build it manually
-                    location_parts = []
-                    if prop.estate.name:
-                        location_parts.append(prop.estate.name)
-                    if hasattr(prop.estate, 'sub_county') and prop.estate.sub_county:
-                        if prop.estate.sub_county.name:
-                            location_parts.append(prop.estate.sub_county.name)
-                        if hasattr(prop.estate.sub_county, 'county') and prop.estate.sub_county.county:
-                            if prop.estate.sub_county.county.name:
-                                location_parts.append(prop.estate.sub_county.county.name)
-                    location_string = ', '.join(location_parts) if location_parts else 'Location not specified'
-                else:
-                    # Fallback to legacy fields
-                    location_parts = []
-                    if prop.estate_name:
-                        location_parts.append(prop.estate_name)
-                    if prop.sub_county:
-                        location_parts.append(prop.sub_county)
-                    if prop.county:
-                        location_parts.append(prop.county)
-                    location_string = ', '.join(location_parts) if location_parts else 'Location not specified'
-            except Exception as e:
-                # If anything fails, use fallback
-                location_parts = []
-                if prop.estate_name:
-                    location_parts.append(prop.estate_name)
-                if prop.sub_county:
-                    location_parts.append(prop.sub_county)
-                if prop.county:
-                    location_parts.append(prop.county)
-                location_string = ', '.join(location_parts) if location_parts else 'Location not specified'
-            
-            # Ensure all required fields have default values
-            # Safely get is_verified (it's a @property, so access directly)
-            try:
-                is_verified = prop.is_verified
-            except:
-                is_verified = (getattr(prop, 'verification_status', 'pending') == 'approved' and 
-                              getattr(prop, 'ai_verification_result', '') == 'MATCH')
-            
-            # Safely get rating
-            try:
-                rating = float(prop.rating) if prop.rating else 0.0
-            except (AttributeError, ValueError, TypeError):
-                rating = 0.0
-            
-            # Get coordinates for map
-            latitude = None
-            longitude = None
-            if prop.latitude and prop.longitude:
-                latitude = float(prop.latitude)
-                longitude = float(prop.longitude)
-            
-            properties.append({
-                'id': prop.id,
-                'name': prop.name or 'Unnamed Property',
-                'location': location_string,
-                'price': float(prop.price) if prop.price else 0,
-                'bedrooms': prop.bedrooms or 0,
-                'bathrooms': prop.bathrooms or 1,
-                'type': prop.property_type or 'apartment',
-                'verified': is_verified,
-                'available': prop.available if prop.available is not None else True,
-                'rating': rating,
-                'reviews': getattr(prop, 'review_count', 0) or 0,
-                'trustScore': getattr(prop, 'trust_score', 0) or 0,
-                'image': image_url,
-                'description': (prop.description[:200] + '...') if prop.description and len(prop.description) > 200 else (prop.description or 'No description available'),
-                'verification_status': getattr(prop, 'verification_status', 'pending'),
-                'verification_score': getattr(prop, 'verification_score', 0) or 0,
-                'latitude': latitude,
-                'longitude': longitude
-            })
+        if columnar:
+            # Compact array-of-arrays: field names once, then one array per row
+            columns = list(fields or LISTING_FIELDS)
+            rows = [search_doc_to_row(doc, columns) for doc in docs]
+            if near:
+                columns.append('distance_km')
+                for row, doc in zip(rows, docs):
+                    row.append(round(doc.distance_km, 3))
+            response = {'fields': columns, 'rows': rows, 'count': len(rows), 'next': next_cursor}
+            if request.GET.get('facets') in ('1', 'true'):
+                response['facets'] = facet_counts(queryset, request.GET)
+            return JsonResponse(response)
+        
+        for doc in docs:
+            row = search_doc_to_dict(doc, fields)
+            if near:
+                row['distance_km'] = round(doc.distance_km, 3)
+            properties.append(row)
         
         # If no properties in database, return sample data for demo
-        if not properties:
+        if not properties and not (fields or cursor or request.GET.get('bbox') or near or request.GET.get('q')):
             properties = [
                 {
                     'id': 1,
@@ -454,7 +300,12 @@ def api_properties(request):
                 }
             ]
         
-        return JsonResponse({'properties': properties, 'count': len(properties)})
+        response = {'properties': properties, 'count': len(properties), 'next': next_cursor}
+        if request.GET.get('facets') in ('1', 'true'):
+            # Counts for the whole filter set, independent of the page
+            response['facets'] = facet_counts(queryset, request.GET)
+        
+        return JsonResponse(response)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -482,6 +333,99 @@ def api_properties(request):
             'error': str(e)
         }, status=500)
 
+@require_http_methods(["GET"])
+@compressed_response
+def api_property_detail(request, property_id):
+    """Full property document: media, amenities, location hierarchy, owner trust and reviews"""
+    # Only a cached version can answer a conditional request without a query;
+    # versions are created once the property is known to exist
+    version = cached_property_version(property_id)
+    if version == PROPERTY_MISSING:
+        return JsonResponse({'error': 'Property not found'}, status=404)
+    if version is not None and is_not_modified(request, f'"p{property_id}-{version}"', version):
+        return set_conditional_headers(HttpResponseNotModified(), f'"p{property_id}-{version}"', version)
+    
+    try:
+        document, version = get_property_detail(property_id)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    if document is None:
+        return JsonResponse({'error': 'Property not found'}, status=404)
+    etag = f'"p{property_id}-{version}"'
+    if is_not_modified(request, etag, version):
+        return set_conditional_headers(HttpResponseNotModified(), etag, version)
+    return set_conditional_headers(JsonResponse(document), etag, version)
+
+@require_http_methods(["GET"])
+def api_property_changes(request):
+    """
+    Change feed: upserts and deletes after ?since=<seq>, in sequence order.
+    Changes appear a few seconds after they commit (changes.COMMIT_LAG), so
+    sequence numbers assigned before commit are not skipped.
+    """
+    try:
+        since = parse_since(request.GET.get('since', ''))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    limit = parse_page_size(request.GET.get('limit'), default=DEFAULT_BATCH_SIZE, maximum=MAX_BATCH_SIZE)
+    return JsonResponse(changes_since(since, limit))
+
+@require_http_methods(["GET"])
+def api_properties_export(request):
+    """Stream the whole (filtered) inventory as NDJSON or CSV for partners and analytics"""
+    if not request.user.is_authenticated:
+        return JsonResponse({
+            'success': False,
+            'error': 'Authentication required to export listings.'
+        }, status=401)
+    
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}, status=400)
+    try:
+        fields = parse_listing_fields(request.GET.get('fields', ''))
+        queryset = export_queryset(request.GET, fields)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    response = StreamingHttpResponse(iter_export(queryset, fmt, fields), content_type=EXPORT_FORMATS[fmt])
+    filename = f"smartkeja-properties-{timezone.now():%Y%m%d-%H%M%S}.{fmt}"
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+@login_required
+@user_passes_test(is_admin)
+def api_listings_cache_stats(request):
+    """Hit/miss counters for the listings response cache (staff only)"""
+    return JsonResponse(cache_stats())
+
+@require_http_methods(["GET"])
+@compressed_response
+def api_property_clusters(request):
+    """Map clusters for a viewport: /api/properties/clusters/?bbox=west,south,east,north&zoom="""
+    try:
+        bbox = parse_bbox(request.GET.get('bbox', ''))
+        zoom = int(request.GET.get('zoom', ''))
+    except ValueError:
+        return JsonResponse({'error': 'bbox=west,south,east,north and an integer zoom are required'}, status=400)
+    
+    try:
+        # bbox is covered by the tiles themselves, so filter on everything else
+        queryset = filter_properties(Property.objects.filter(available=True), request.GET, geo=False)
+        cache_prefix = f'{listings_version()}:{filter_key(request.GET, ATTRIBUTE_FILTER_PARAMS)}'
+        clusters = clusters_for_bbox(queryset, bbox, zoom, cache_prefix=cache_prefix)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    
+    return JsonResponse({
+        'zoom': zoom,
+        'clusters': clusters,
+        'count': sum(cluster['count'] for cluster in clusters),
+    })
+
 def notify_landlord_booking(booking, property_obj):
     """
     Notify landlord via WhatsApp when someone books their property
@@ -930,34 +874,56 @@ def api_booking(request):
 
 @require_http_methods(["GET"])
 def api_locations(request):
-    """API endpoint for location hierarchy"""
-    try:
-        # Try to get from locations app
-        try:
-            from locations.models import County, SubCounty, Estate
-            locations = []
-            for estate in Estate.objects.select_related('sub_county', 'sub_county__county').all()[:100]:
-                locations.append({
-                    'county': estate.sub_county.county.name if estate.sub_county and estate.sub_county.county else '',
-                    'sub_county': estate.sub_county.name if estate.sub_county else '',
-                    'estate': estate.name,
-                    'center_latitude': str(estate.center_latitude) if estate.center_latitude else None,
-                    'center_longitude': str(estate.center_longitude) if estate.center_longitude else None,
-                })
-        except:
-            # Fallback to default locations
-            locations = [
-                {'county': 'Nairobi', 'sub_county': 'Westlands', 'estate': 'Kilimani', 'center_latitude': '-1.2921', 'center_longitude': '36.8219'},
-                {'county': 'Nairobi', 'sub_county': 'Westlands', 'estate': 'Westlands', 'center_latitude': '-1.2656', 'center_longitude': '36.8025'},
-                {'county': 'Nairobi', 'sub_county': 'Westlands', 'estate': 'Parklands', 'center_latitude': '-1.2684', 'center_longitude': '36.8123'},
-                {'county': 'Nairobi', 'sub_county': 'Nairobi South', 'estate': 'Karen', 'center_latitude': '-1.3197', 'center_longitude': '36.7084'},
-                {'county': 'Mombasa', 'sub_county': 'Nyali', 'estate': 'Nyali', 'center_latitude': '-4.0435', 'center_longitude': '39.6682'},
-                {'county': 'Kisumu', 'sub_county': 'Kisumu Central', 'estate': 'Milimani', 'center_latitude': '-0.0917', 'center_longitude': '34.7680'},
-            ]
-        
-        return JsonResponse({'locations': locations})
-    except Exception as e:
-        return JsonResponse({'locations': [], 'error': str(e)}, status=500)
+    """Full County -> SubCounty -> Ward -> Estate tree, cached per locations version"""
+    version = locations_version()
+    encoding = preferred_encoding(accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING')))
+    # A client holding any representation of this version can keep it
+    etags = {tree_etag(version), tree_etag(version, encoding)}
+    if any(is_not_modified(request, etag, version) for etag in etags):
+        response = HttpResponseNotModified()
+    else:
+        bodies = get_location_tree(version)
+        if len(bodies[None]) < MIN_COMPRESS_SIZE:
+            encoding = None
+        response = HttpResponse(bodies[encoding], content_type='application/json')
+        if encoding:
+            response['Content-Encoding'] = encoding
+    
+    set_conditional_headers(response, tree_etag(version, encoding), version)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Cache-Control'] = f'public, max-age={TREE_MAX_AGE}'
+    return response
+
+@require_http_methods(["GET"])
+def api_popular_locations(request):
+    """Estates with the most available listings, straight off Estate.property_count"""
+    from locations.models import Estate
+    limit = parse_page_size(request.GET.get('limit'), default=10, maximum=50)
+    estates = Estate.objects.filter(property_count__gt=0)
+    county = request.GET.get('county', '').strip()
+    if county:
+        estates = estates.filter(sub_county__county__name__iexact=county)
+    areas = [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'sub_county': row['sub_county__name'],
+            'county': row['sub_county__county__name'],
+            'is_popular': row['is_popular'],
+            'property_count': row['property_count'],
+        }
+        for row in estates.order_by('-property_count', 'name').values(
+            'id', 'name', 'sub_county__name', 'sub_county__county__name', 'is_popular', 'property_count'
+        )[:limit]
+    ]
+    return JsonResponse({'areas': areas})
+
+@require_http_methods(["GET"])
+def api_location_suggest(request):
+    """Type-ahead suggestions for counties, sub-counties, wards and estates"""
+    q = request.GET.get('q', '').strip()
+    limit = parse_page_size(request.GET.get('limit'), default=SUGGEST_LIMIT, maximum=MAX_SUGGEST_LIMIT)
+    return JsonResponse({'query': q, 'suggestions': suggest_locations(q, limit) if q else []})
 
 @csrf_exempt
 @require_POST
@@ -969,32 +935,111 @@ def api_upload(request):
         
         file = request.FILES['file']
         
-        # Validate file size (20MB max)
-        if file.size > 20 * 1024 * 1024:
+        # Validate file size (20MB max; larger files use the chunked upload API)
+        if file.size > MAX_UPLOAD_SIZE:
             return JsonResponse({'error': 'File too large'}, status=400)
         
-        # Generate unique filename
-        ext = os.path.splitext(file.name)[1]
-        filename = f"{uuid.uuid4()}{ext}"
-        
         # Validate file type
-        allowed_extensions = ['.jpg', '.jpeg', '.png', '.pdf', '.mp4', '.mov']
-        if ext.lower() not in allowed_extensions:
+        ext = os.path.splitext(file.name)[1]
+        if ext.lower() not in ALLOWED_UPLOAD_EXTENSIONS:
             return JsonResponse({'error': 'Invalid file type'}, status=400)
         
-        # Save file
-        file_path = default_storage.save(f'uploads/{filename}', file)
-        file_url = default_storage.url(file_path)
+        # GPS from the EXIF header lets the listing wizard pre-fill the map pin
+        gps = None
+        if ext.lower() in ('.jpg', '.jpeg', '.png'):
+            exif = parse_exif(file.read(HEADER_BYTES))
+            if exif['latitude'] is not None:
+                gps = {'latitude': exif['latitude'], 'longitude': exif['longitude']}
+        
+        # Save file under its content hash; identical bytes are stored once
+        blob, created = store_blob(file, ext)
+        file_url = default_storage.url(blob.file)
         
         return JsonResponse({
             'success': True,
             'url': file_url,
             'file_url': file_url,
-            'filename': filename
+            'filename': os.path.basename(blob.file),
+            'sha256': blob.sha256,
+            'deduplicated': not created,
+            'gps': gps,
         })
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
 
+def _upload_status(upload):
+    return {
+        'upload_id': str(upload.pk),
+        'offset': upload.received,
+        'size': upload.size,
+        'status': upload.status,
+        'max_chunk_size': MAX_CHUNK_SIZE,
+    }
+
+def _get_upload(request, upload_id):
+    """The upload, or None if it does not exist or is not the requesting user's"""
+    if not request.user.is_authenticated:
+        return None
+    return ChunkedUpload.objects.filter(pk=upload_id, user=request.user).first()
+
+@csrf_exempt
+@require_POST
+def api_upload_start(request):
+    """Begin a chunked upload: {"filename": ..., "size": bytes}"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required to upload files.'}, status=401)
+    try:
+        data = json.loads(request.body)
+        upload = start_upload(request.user, data.get('filename', ''), data.get('size'))
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Invalid JSON data'}, status=400)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(_upload_status(upload), status=201)
+
+@csrf_exempt
+@require_http_methods(["GET", "PUT"])
+def api_upload_chunk(request, upload_id):
+    """GET: current offset to resume from. PUT: raw chunk bytes starting at Upload-Offset"""
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    if request.method == 'GET':
+        return JsonResponse(_upload_status(upload))
+    
+    try:
+        offset = int(request.headers.get('Upload-Offset', request.GET.get('offset', '')))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'Upload-Offset must be an integer'}, status=400)
+    try:
+        write_chunk(upload, offset, request, length)
+    except OffsetMismatch as e:
+        return JsonResponse({'error': str(e), **_upload_status(upload)}, status=409)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(_upload_status(upload))
+
+@csrf_exempt
+@require_POST
+def api_upload_finalize(request, upload_id):
+    """Assemble a fully received upload into media storage"""
+    upload = _get_upload(request, upload_id)
+    if upload is None:
+        return JsonResponse({'error': 'Upload not found'}, status=404)
+    try:
+        file_path = finalize_upload(upload)
+    except OffsetMismatch as e:
+        return JsonResponse({'error': f'Upload incomplete: {e}', **_upload_status(upload)}, status=409)
+    
+    file_url = default_storage.url(file_path)
+    return JsonResponse({
+        'success': True,
+        'url': file_url,
+        'file_url': file_url,
+        'filename': os.path.basename(file_path)
+    })
+
 @csrf_exempt
 @require_POST
 def api_submit_property(request):
@@ -1046,9 +1091,10 @@ def api_submit_property(request):
             except (ValueError, InvalidOperation):
                 pass
         
-        # Create property
+        # Create property, linked to the estate nearest its GPS pin
         property_obj = Property.objects.create(
             owner=request.user,
+            estate_id=reverse_geocode(latitude, longitude),
             name=data.get('name', 'Unnamed Property'),
             description=data.get('description', ''),
             property_type=data.get('property_type', 'apartment'),
@@ -1066,26 +1112,28 @@ def api_submit_property(request):
             available=True
         )
         
-        # Simulate AI verification
-        import random
-        verification_results = ['MATCH', 'PARTIAL', 'FAILED']
-        property_obj.ai_verification_result = random.choice(verification_results)
-        if property_obj.ai_verification_result == 'MATCH':
-            property_obj.verification_status = 'approved'
-            property_obj.verification_score = 95
-        elif property_obj.ai_verification_result == 'PARTIAL':
-            property_obj.verification_status = 'pending'
-            property_obj.verification_score = 65
-        else:
-            property_obj.verification_status = 'rejected'
-            property_obj.verification_score = 30
-        property_obj.save()
+        # Attach the photos uploaded through api_upload; the first is the cover
+        for position, name in enumerate(blob_names(data.get('images') or [])):
+            PropertyImage.objects.create(property=property_obj, image=name, is_primary=position == 0)
+        
+        # Verify the pin against where the photos were taken; listings without
+        # geotagged photos stay pending for manual review
+        result, score = verify_photo_locations(property_obj)
+        if result:
+            property_obj.ai_verification_result = result
+            property_obj.verification_status = VERIFICATION_STATUSES[result]
+            property_obj.verification_score = score
+            # Only these fields: the image signals set cover_image with update()
+            property_obj.save(update_fields=[
+                'ai_verification_result', 'verification_status', 'verification_score', 'updated_at',
+            ])
         
         return JsonResponse({
             'success': True,
             'property': {
                 'id': property_obj.id,
                 'name': property_obj.name,
+                'estate_id': property_obj.estate_id,
                 'verification_status': property_obj.verification_status,
                 'ai_verification_result': property_obj.ai_verification_result,
                 'verification_score': property_obj.verification_score
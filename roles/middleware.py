@@ -1,73 +1,76 @@
 """
 Middleware for role switching and role-based access control
 """
+from django.core.cache import cache
+from django.db import DatabaseError
 from django.utils.deprecation import MiddlewareMixin
-from django.shortcuts import redirect
-from django.urls import reverse
+from django.utils.functional import SimpleLazyObject
 from .models import RoleSession, UserRole
 
+ROLES_TIMEOUT = 60 * 60
+
+
+def _roles_key(user_id):
+    return f'roles:user:{user_id}'
+
+
+def invalidate_roles(user_id):
+    """Forget the cached roles for user_id (UserRole / RoleSession signals call this)"""
+    cache.delete(_roles_key(user_id))
+
+
+def _resolve_current_role(user):
+    """The user's active role, creating a tenant role and role session on first use"""
+    try:
+        role_session = RoleSession.objects.select_related('current_role').get(user=user)
+        return role_session.current_role
+    except RoleSession.DoesNotExist:
+        pass
+    
+    # Meta ordering puts the primary role first, then the newest
+    primary_role = UserRole.objects.filter(user=user, is_active=True).first()
+    if not primary_role:
+        primary_role = UserRole.add_role(user, 'tenant', is_primary=True)
+    role_session, created = RoleSession.objects.get_or_create(
+        user=user,
+        defaults={'current_role': primary_role}
+    )
+    return role_session.current_role
+
+
+def resolve_roles(user):
+    """
+    (current_role, active roles) for user, from the cache when possible.
+    Misses cost a couple of queries; steady state costs none.
+    """
+    key = _roles_key(user.pk)
+    roles = cache.get(key)
+    if roles is None:
+        try:
+            roles = (_resolve_current_role(user), list(UserRole.get_user_roles(user)))
+        except DatabaseError:
+            # Tables don't exist yet - skip role management
+            return None, []
+        cache.set(key, roles, ROLES_TIMEOUT)
+    return roles
+
 
 class RoleSwitchingMiddleware(MiddlewareMixin):
     """
-    Middleware that manages role switching and provides current_role to request
+    Middleware that manages role switching and provides current_role to request.
+    Both attributes are lazy: nothing is looked up unless a view reads them.
     """
     
     def process_request(self, request):
-        """Set the current active role for the user"""
-        if request.user.is_authenticated:
-            try:
-                # Check if tables exist by trying to query
-                role_session = RoleSession.objects.get(user=request.user)
-                request.current_role = role_session.current_role
-            except (RoleSession.DoesNotExist, Exception):
-                # Handle case where table doesn't exist yet or session doesn't exist
-                try:
-                    # Try to get or create primary role
-                    primary_role = UserRole.objects.filter(
-                        user=request.user,
-                        is_active=True,
-                        is_primary=True
-                    ).first()
-                    
-                    if not primary_role:
-                        # Get first active role or create tenant role
-                        primary_role = UserRole.objects.filter(
-                            user=request.user,
-                            is_active=True
-                        ).first()
-                        
-                        if not primary_role:
-                            try:
-                                primary_role = UserRole.add_role(request.user, 'tenant', is_primary=True)
-                            except Exception:
-                                # Tables might not exist yet
-                                primary_role = None
-                    
-                    # Try to create role session if it doesn't exist
-                    if primary_role:
-                        try:
-                            role_session, created = RoleSession.objects.get_or_create(
-                                user=request.user,
-                                defaults={'current_role': primary_role}
-                            )
-                            request.current_role = role_session.current_role
-                        except Exception:
-                            # Table doesn't exist yet
-                            request.current_role = None
-                    else:
-                        request.current_role = None
-                except Exception:
-                    # Tables don't exist yet - skip role management
-                    request.current_role = None
-            
-            # Get all user roles for context
-            try:
-                request.user_roles = UserRole.get_user_roles(request.user)
-            except Exception:
-                request.user_roles = []
-        else:
-            request.current_role = None
-            request.user_roles = []
+        """Attach the current active role and the user's roles"""
+        resolved = []
+        
+        def roles():
+            if not resolved:
+                user = request.user
+                resolved.append(resolve_roles(user) if user.is_authenticated else (None, []))
+            return resolved[0]
         
+        request.current_role = SimpleLazyObject(lambda: roles()[0])
+        request.user_roles = SimpleLazyObject(lambda: roles()[1])
         return None
-
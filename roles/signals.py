@@ -0,0 +1,15 @@
+"""
+Signal handlers that drop a user's cached role resolution when it changes
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import RoleSession, UserRole
+from .middleware import invalidate_roles
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(post_delete, sender=UserRole)
+@receiver(post_save, sender=RoleSession)
+@receiver(post_delete, sender=RoleSession)
+def role_changed(sender, instance, **kwargs):
+    invalidate_roles(instance.user_id)
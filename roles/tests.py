@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from .middleware import RoleSwitchingMiddleware
+from .models import RoleSession, UserRole
+
+
+class RoleSwitchingMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('tenant', password='pass12345')
+        self.middleware = RoleSwitchingMiddleware(lambda request: None)
+
+    def request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        self.middleware.process_request(request)
+        return request
+
+    def test_untouched_roles_cost_no_queries(self):
+        with self.assertNumQueries(0):
+            self.request()
+
+    def test_cold_user_gets_tenant_role_then_cached(self):
+        request = self.request()
+        self.assertEqual(request.current_role.role_type, 'tenant')
+        self.assertTrue(RoleSession.objects.filter(user=self.user).exists())
+        
+        with self.assertNumQueries(0):
+            request = self.request()
+            self.assertEqual(request.current_role.role_type, 'tenant')
+            self.assertEqual([role.role_type for role in request.user_roles], ['tenant'])
+
+    def test_role_changes_invalidate_cache(self):
+        self.assertEqual(len(self.request().user_roles), 1)
+        landlord = UserRole.add_role(self.user, 'landlord')
+        self.assertEqual(len(self.request().user_roles), 2)
+        
+        role_session = RoleSession.objects.get(user=self.user)
+        role_session.current_role = landlord
+        role_session.save()
+        self.assertEqual(self.request().current_role.role_type, 'landlord')
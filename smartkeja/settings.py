@@ -105,6 +105,29 @@ DATABASES = {
 }
 
 
+# Cache (listing responses, facets, map clusters)
+# File-based by default so every worker process on a host sees the same
+# invalidation version; point CACHE_BACKEND at Redis/Memcached to scale out.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', str(BASE_DIR / '.cache')),
+    }
+}
+if CACHES['default']['BACKEND'].endswith('FileBasedCache'):
+    # Django's default of 300 entries culls a random third of the cache,
+    # invalidation version keys included, once per-user and tile entries fill it.
+    # Every set() lists the directory to check the size, so request paths keep
+    # writes to cache misses (see properties.caching._count)
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.environ.get('CACHE_MAX_ENTRIES', '50000')),
+        'CULL_FREQUENCY': 10,
+    }
+
+# Tests swap in a local-memory cache (see smartkeja/test_runner.py)
+TEST_RUNNER = 'smartkeja.test_runner.LocMemCacheTestRunner'
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -152,6 +175,12 @@ STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Partial files for chunked uploads; must be shared by all workers serving /api/uploads/
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR', str(BASE_DIR / '.uploads'))
+
+# Processes per web worker rendering listing thumbnails; 0 renders them inline
+THUMBNAIL_WORKERS = int(os.environ.get('THUMBNAIL_WORKERS', '2'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -383,9 +383,11 @@ export class MapLocation {
             const data = await response.json();
             console.log('Location API response:', data);
             
-            // API returns {locations: [...]}, so extract the array
+            // API returns {version, counties: [...]} as a nested tree; flatten it
             let locations = [];
-            if (Array.isArray(data)) {
+            if (data && Array.isArray(data.counties)) {
+                locations = this.flattenLocationTree(data.counties);
+            } else if (Array.isArray(data)) {
                 locations = data;
             } else if (data && Array.isArray(data.locations)) {
                 locations = data.locations;
@@ -410,6 +412,28 @@ export class MapLocation {
         }
     }
 
+    flattenLocationTree(counties) {
+        // One {county, sub_county, estate, center_latitude, center_longitude} row per estate
+        const locations = [];
+        counties.forEach(county => {
+            county.sub_counties.forEach(subCounty => {
+                const estates = subCounty.estates.concat(
+                    ...subCounty.wards.map(ward => ward.estates)
+                );
+                estates.forEach(estate => {
+                    locations.push({
+                        county: county.name,
+                        sub_county: subCounty.name,
+                        estate: estate.name,
+                        center_latitude: estate.latitude,
+                        center_longitude: estate.longitude
+                    });
+                });
+            });
+        });
+        return locations;
+    }
+
     populateLocationDropdowns(locations) {
         const countySelect = document.getElementById('propertyCounty');
         const subCountySelect = document.getElementById('propertySubCounty');